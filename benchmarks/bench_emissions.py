@@ -0,0 +1,35 @@
+"""
+Benchmark vectorized avoided-emission totals over millions of items
+
+Usage: python benchmarks/bench_emissions.py [number_of_items]
+"""
+import os
+import sys
+import time
+import numpy as np
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.emission_calculator import EmissionCalculator
+
+def bench(items=5_000_000, groups=100_000):
+    calculator = EmissionCalculator()
+    rng = np.random.default_rng(42)
+    food_codes = rng.integers(0, calculator.unknown_food_code + 1, size=items, dtype=np.int32)
+    quantities = rng.integers(1, 6, size=items).astype(np.float64)
+    weights = rng.uniform(0.05, 1.5, size=items)
+    group_ids = rng.integers(0, groups, size=items)
+    
+    for label, kwargs in [
+        ("total", {}),
+        ("total, weight-aware", {'weights': weights}),
+        ("per group, weight-aware", {'weights': weights, 'groups': group_ids, 'n_groups': groups})
+    ]:
+        start = time.perf_counter()
+        calculator.calculate_avoided_emissions_batch(food_codes, quantities, **kwargs)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<26} {items / elapsed / 1e6:8.1f} M items/s")
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000)
@@ -0,0 +1,52 @@
+"""
+Benchmark fridge image analysis of 12MP phone photos
+
+Compares full-resolution decoding one image at a time with the batched
+pipeline that decodes at reduced resolution on worker threads.
+
+Usage: python benchmarks/bench_image_inference.py [number_of_images]
+"""
+import os
+import sys
+import tempfile
+import time
+import cv2
+import numpy as np
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.image_recognition import FridgeImageAnalyzer
+
+def make_photo(path, width=4000, height=3000, seed=42):
+    """Write a smooth synthetic photo with the size of a 12MP phone camera"""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (height // 50, width // 50, 3), dtype=np.uint8)
+    cv2.imwrite(path, cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC))
+
+def main():
+    images = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'fridge.jpg')
+        make_photo(path)
+        paths = [path] * images
+        analyzer = FridgeImageAnalyzer(batch_size=16)
+        analyzer.analyze_images(paths[:2])
+        
+        start = time.perf_counter()
+        for image_path in paths:
+            image = cv2.imread(image_path)
+            analyzer._preprocess(image, analyzer._inputs[0, 0])
+            analyzer.model.run(analyzer._inputs[0, :1])
+        full = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        analyzer.analyze_images(paths)
+        pipelined = time.perf_counter() - start
+    
+    print(f"{images} photos of 4000x3000, {analyzer.decode_workers} decode workers")
+    print(f"full decode, one at a time: {full * 1000 / images:.1f} ms/image")
+    print(f"reduced decode, batches of {analyzer.batch_size}: {pipelined * 1000 / images:.1f} ms/image ({full / pipelined:.1f}x)")
+
+if __name__ == "__main__":
+    main()
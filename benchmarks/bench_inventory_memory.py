@@ -0,0 +1,37 @@
+"""
+Compare memory used by item dicts, FoodItem records and InventoryBatch columns
+
+Usage: python benchmarks/bench_inventory_memory.py [number_of_items]
+"""
+import os
+import sys
+import random
+import tracemalloc
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.inventory import FoodItem, InventoryBatch
+
+NAMES = ['tomato', 'banana', 'apple', 'milk', 'bread', 'egg', 'chicken', 'lettuce']
+
+def measure(label, build, items):
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<16} {current / 1e6:8.1f} MB {current / items:8.1f} bytes/item")
+    return result
+
+def bench(items=1_000_000, per_household=10):
+    rng = random.Random(42)
+    # Quantities and days beyond the small-int cache so every dict owns its values
+    rows = [(rng.choice(NAMES), rng.randint(300, 400), rng.randint(300, 400)) for _ in range(items)]
+    
+    dicts = measure("dicts", lambda: [{'name': n, 'quantity': q, 'days_until_expiry': d} for n, q, d in rows], items)
+    measure("FoodItem", lambda: [FoodItem(n, q, d) for n, q, d in rows], items)
+    households = {i: dicts[i * per_household:(i + 1) * per_household] for i in range(items // per_household)}
+    measure("InventoryBatch", lambda: InventoryBatch.from_households(households), items)
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
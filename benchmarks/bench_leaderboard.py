@@ -0,0 +1,62 @@
+"""
+Benchmark leaderboard updates and rank queries at large user counts
+
+Usage: python benchmarks/bench_leaderboard.py [number_of_users]
+"""
+import os
+import sys
+import json
+import random
+import tempfile
+import time
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.leaderboard import Leaderboard
+
+def timed(label, func, operations):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {operations:>8} ops {elapsed:>8.3f} s {elapsed / operations * 1e6:>10.2f} us/op")
+
+def bench(users=1_000_000, operations=10_000):
+    rng = random.Random(42)
+    usernames = [f"user{i}" for i in range(users)]
+    
+    with tempfile.TemporaryDirectory() as directory:
+        data_file = os.path.join(directory, 'leaderboard.json')
+        with open(data_file, 'w') as f:
+            json.dump([
+                {
+                    'username': username,
+                    'total_emissions_avoided': round(rng.uniform(0, 500), 2),
+                    'total_items_saved': rng.randint(0, 500),
+                    'contributions': 1,
+                    'last_contribution': '2025-01-01T00:00:00'
+                }
+                for username in usernames
+            ], f)
+        
+        start = time.perf_counter()
+        board = Leaderboard(data_file=data_file, compact_every=operations * 10)
+        print(f"Loaded {len(board)} users in {time.perf_counter() - start:.2f} s")
+        
+        sample = [rng.choice(usernames) for _ in range(operations)]
+        timed("add_user_contribution", lambda: [board.add_user_contribution(u, rng.uniform(0, 5), 1) for u in sample], operations)
+        batch = [(u, rng.uniform(0, 5), 1) for u in sample]
+        timed("add_user_contributions", lambda: board.add_user_contributions(batch), operations)
+        timed("get_user_rank", lambda: [board.get_user_rank(u) for u in sample], operations)
+        timed("get_users_around(window=5)", lambda: [board.get_users_around(u, window=5) for u in sample], operations)
+        timed("get_top_users(10)", lambda: [board.get_top_users(10) for _ in sample], operations)
+        board.close()
+        
+        # Reads that look for other processes' contributions at most every 50 ms
+        board = Leaderboard(data_file=data_file, compact_every=operations * 10, refresh_interval_ms=50)
+        timed("get_user_rank (refresh 50ms)", lambda: [board.get_user_rank(u) for u in sample], operations)
+        timed("get_top_users(10) (refresh)", lambda: [board.get_top_users(10) for _ in sample], operations)
+        board.close()
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
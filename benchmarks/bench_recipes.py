@@ -0,0 +1,63 @@
+"""
+Benchmark recipe recommendation against a large synthetic catalog
+
+Usage: python benchmarks/bench_recipes.py [number_of_recipes]
+"""
+import os
+import sys
+import random
+import time
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.recipe_recommender import RecipeRecommender
+
+def make_catalog(recipes, ingredients=2000, seed=42):
+    """Generate recipes using 2-8 ingredients from a fixed vocabulary"""
+    rng = random.Random(seed)
+    vocabulary = [f"ingredient{i}" for i in range(ingredients)]
+    return {
+        f"recipe{i}": {
+            'name': f"Recipe {i}",
+            'ingredients': rng.sample(vocabulary, rng.randint(2, 8)),
+            'instructions': '',
+            'preparation_time': rng.randint(5, 60)
+        }
+        for i in range(recipes)
+    }, vocabulary
+
+def linear_scan(recipe_database, food_items):
+    """The previous algorithm: scan every recipe and ingredient"""
+    expiring_items = [item['name'] for item in food_items if item['days_until_expiry'] <= 3]
+    return [recipe for recipe in recipe_database.values()
+            if any(ingredient in expiring_items for ingredient in recipe['ingredients'])]
+
+def bench(recipes=100_000, queries=50):
+    catalog, vocabulary = make_catalog(recipes)
+    rng = random.Random(7)
+    fridges = [
+        [{'name': name, 'quantity': rng.randint(1, 4), 'days_until_expiry': rng.randint(0, 7)}
+         for name in rng.sample(vocabulary, 15)]
+        for _ in range(queries)
+    ]
+    
+    start = time.perf_counter()
+    recommender = RecipeRecommender(catalog)
+    print(f"Indexed {recipes} recipes in {time.perf_counter() - start:.2f} s")
+    
+    start = time.perf_counter()
+    for food_items in fridges:
+        linear_scan(catalog, food_items)
+    scan = (time.perf_counter() - start) / queries
+    
+    start = time.perf_counter()
+    for food_items in fridges:
+        recommender.recommend_recipes(food_items)
+    indexed = (time.perf_counter() - start) / queries
+    
+    print(f"linear scan:    {scan * 1000:8.2f} ms/query")
+    print(f"inverted index: {indexed * 1000:8.2f} ms/query ({scan / indexed:.0f}x faster)")
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
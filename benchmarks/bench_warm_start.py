@@ -0,0 +1,50 @@
+"""
+Benchmark cold refits against warm-started updates of FoodWastePredictor
+
+Usage: python benchmarks/bench_warm_start.py
+"""
+import os
+import sys
+import time
+import logging
+import numpy as np
+import pandas as pd
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.waste_predictor import FoodWastePredictor
+
+def make_history(days, seed=42):
+    """Generate a synthetic daily waste series like data/prepare_data.py"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start='2021-01-01', periods=days, freq='D')
+    y = 5 + np.sin(2 * np.pi * np.arange(days) / 7) * 2 + np.linspace(0, 2, days) + rng.normal(0, 1, days)
+    return pd.DataFrame({'ds': dates, 'y': np.maximum(y, 0)})
+
+def bench(history_lengths=(90, 180, 365, 730, 1460), repeats=3):
+    print(f"{'history':>8} {'cold (s)':>10} {'warm (s)':>10} {'speedup':>8}")
+    for days in history_lengths:
+        df = make_history(days + 1)
+        cold_times = []
+        warm_times = []
+        for _ in range(repeats):
+            # Cold path: refit the whole history including the new day
+            predictor = FoodWastePredictor()
+            start = time.perf_counter()
+            predictor.train_model(df)
+            cold_times.append(time.perf_counter() - start)
+            
+            # Warm path: fit the old history once, then update with the new day
+            predictor = FoodWastePredictor()
+            predictor.train_model(df.iloc[:-1])
+            start = time.perf_counter()
+            predictor.update(df.iloc[-1:])
+            warm_times.append(time.perf_counter() - start)
+        cold = min(cold_times)
+        warm = min(warm_times)
+        print(f"{days:>8} {cold:>10.3f} {warm:>10.3f} {cold / warm:>7.1f}x")
+
+if __name__ == "__main__":
+    logging.getLogger('cmdstanpy').disabled = True
+    bench()
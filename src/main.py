@@ -3,6 +3,7 @@ Main application file for FoodPrint Forecast
 """
 import os
 import sys
+import json
 import argparse
 
 # Add src directory to path
@@ -10,20 +11,83 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from src.models.coordinator import FoodPrintForecast
 
+def load_contributions(path):
+    """
+    Read contributions from a JSON array or a JSON Lines file
+    
+    Args:
+        path (str): File of {'username', 'emission_results'} records
+    
+    Returns:
+        tuple: (contributions, errors) where errors lists the lines of a
+            JSON Lines file that could not be parsed
+    """
+    with open(path, 'r') as f:
+        text = f.read()
+    try:
+        contributions = json.loads(text)
+        if isinstance(contributions, list):
+            return contributions, []
+        return [contributions], []
+    except ValueError:
+        pass
+    
+    contributions = []
+    errors = []
+    for number, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            contributions.append(json.loads(line))
+        except ValueError as e:
+            errors.append(f"line {number}: {e}")
+    return contributions, errors
+
 def main():
     parser = argparse.ArgumentParser(description="FoodPrint Forecast - Sistem Prediksi Limbah Pangan Rumah Tangga")
     parser.add_argument("--web", action="store_true", help="Run the web application")
+    parser.add_argument("--serve", action="store_true", help="Serve the web application with multiple worker processes")
+    parser.add_argument("--bind", type=str, default="127.0.0.1:5000", help="Address for --serve, as host:port")
+    parser.add_argument("--workers", type=int, help="Worker processes for --serve (default: CPU count)")
+    parser.add_argument("--threads", type=int, default=4, help="Request threads per worker for --serve")
+    parser.add_argument("--no-preload", action="store_true", help="Load data in each worker instead of before forking")
+    parser.add_argument("--training-data", type=str, help="Waste history CSV whose forecast model --serve preloads")
     parser.add_argument("--image", type=str, help="Path to fridge image for analysis")
     parser.add_argument("--username", type=str, help="Username for leaderboard contribution")
+    parser.add_argument("--contributions-file", type=str, help="JSON or JSON Lines file of contributions to add in one batch")
     
     args = parser.parse_args()
     
-    if args.web:
+    if args.serve:
+        # Run web application with preforked workers
+        from src.web.serve import serve, default_workers
+        workers = args.workers or default_workers()
+        print(f"Serving FoodPrint Forecast on http://{args.bind} with {workers} workers...")
+        try:
+            serve(bind=args.bind, workers=workers, threads=args.threads,
+                  preload=not args.no_preload, training_data=args.training_data)
+        except ValueError as e:
+            print(f"Error: {str(e)}")
+    elif args.web:
         # Run web application
         from src.web.app import app
         print("Starting FoodPrint Forecast web application...")
         print("Visit http://localhost:5000 in your browser")
         app.run(debug=True)
+    elif args.contributions_file:
+        # Ingest a batch of contributions, e.g. synced from offline devices
+        if not os.path.exists(args.contributions_file):
+            print(f"Error: Contributions file {args.contributions_file} not found")
+            return
+        
+        contributions, parse_errors = load_contributions(args.contributions_file)
+        system = FoodPrintForecast()
+        result = system.add_user_contributions(contributions)
+        print(f"Added {result['accepted']} of {len(contributions) + len(parse_errors)} contributions")
+        for error in parse_errors:
+            print(f"- Skipped {error}")
+        for error in result['errors']:
+            print(f"- Rejected record {error['index']}: {error['error']}")
     elif args.image:
         # Analyze image from command line
         if not os.path.exists(args.image):
@@ -38,7 +102,7 @@ def main():
             
             print("\nDetected items:")
             for item in results['detected_items']:
-                status = " (EXPIRING SOON!)" if item['days_until_expiry'] <= 3 else ""
+                status = " (EXPIRING SOON!)" if item['days_until_expiry'] <= system.expiry_threshold else ""
                 print(f"- {item['name']}: {item['quantity']} items, expires in {item['days_until_expiry']} days{status}")
             
             print(f"\nWaste prediction:")
@@ -73,8 +137,10 @@ def main():
         print("=" * 60)
         print("Usage:")
         print("  python src/main.py --web              # Run web application")
+        print("  python src/main.py --serve [--workers N]  # Serve web application in production")
         print("  python src/main.py --image <path>     # Analyze fridge image")
         print("  python src/main.py --image <path> --username <name>  # Analyze and contribute to leaderboard")
+        print("  python src/main.py --contributions-file <path>  # Add a batch of contributions")
         print("=" * 60)
         print("\nFeatures:")
         print("1. Prediksi limbah pangan berdasarkan foto isi kulkas")
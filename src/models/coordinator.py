@@ -2,41 +2,152 @@
 Coordinator module that integrates all components of FoodPrint Forecast
 """
 import os
-from models.image_recognition import FridgeImageAnalyzer
-from models.waste_predictor import FoodWastePredictor
-from models.recipe_recommender import RecipeRecommender
-from models.emission_calculator import EmissionCalculator
-from models.leaderboard import Leaderboard
+import threading
+
+DETECTION_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'detections')
 
 class FoodPrintForecast:
-    def __init__(self):
-        self.image_analyzer = FridgeImageAnalyzer()
-        self.waste_predictor = FoodWastePredictor()
-        self.recipe_recommender = RecipeRecommender()
-        self.emission_calculator = EmissionCalculator()
-        self.leaderboard = Leaderboard()
+    def __init__(self, leaderboard_flush_ms=0, expiry_threshold=3, recipe_top_k=5, detection_cache_entries=1024,
+                 detection_cache_dir=DETECTION_CACHE_DIR):
+        """
+        Args:
+            leaderboard_flush_ms (int): Group-commit interval for leaderboard
+                writes. 0 writes every contribution immediately. Reads check
+                for other processes' contributions at the same interval,
+                since those can be that late anyway
+            expiry_threshold (int): Items expiring within this many days are
+                treated as at risk by every component
+            recipe_top_k (int): Number of recipes recommended per analysis.
+                None recommends every matching recipe
+            detection_cache_entries (int): Number of image analysis results
+                kept on disk by image content. 0 disables the cache. A result
+                holds at most one item per detector class (under 1 KB with
+                the shipped model), so the count also bounds the cache size:
+                about 4 MB on disk at the default, one filesystem block each
+            detection_cache_dir (str): Directory of the image analysis
+                results. Defaults to data/detections of the repository,
+                whatever the working directory
+        """
+        self.leaderboard_flush_ms = leaderboard_flush_ms
+        self.expiry_threshold = expiry_threshold
+        self.recipe_top_k = recipe_top_k
+        self.detection_cache_entries = detection_cache_entries
+        self.detection_cache_dir = detection_cache_dir
+        # Components and their heavy dependencies (pandas, Prophet, OpenCV)
+        # are imported and built on first use, so code paths such as the
+        # leaderboard never pay for the forecasting or vision stacks
+        self._components = {}
+        # Reentrant because some factories build the components they depend on
+        self._lock = threading.RLock()
+    
+    def _get_component(self, name, factory):
+        """Return a component, building it on first use"""
+        component = self._components.get(name)
+        if component is None:
+            with self._lock:
+                component = self._components.get(name)
+                if component is None:
+                    component = factory()
+                    self._components[name] = component
+        return component
+    
+    @property
+    def image_analyzer(self):
+        def factory():
+            from models.image_recognition import FridgeImageAnalyzer
+            from models.disk_cache import DiskLRUCache
+            result_cache = None
+            if self.detection_cache_entries:
+                result_cache = DiskLRUCache(self.detection_cache_dir, max_entries=self.detection_cache_entries, suffix='.json')
+            return FridgeImageAnalyzer(result_cache=result_cache)
+        return self._get_component('image_analyzer', factory)
+    
+    @property
+    def waste_predictor(self):
+        def factory():
+            from models.waste_predictor import FoodWastePredictor
+            from models.model_store import ModelStore
+            return FoodWastePredictor(model_store=ModelStore())
+        return self._get_component('waste_predictor', factory)
+    
+    @property
+    def recipe_recommender(self):
+        def factory():
+            from models.recipe_recommender import RecipeRecommender
+            return RecipeRecommender()
+        return self._get_component('recipe_recommender', factory)
+    
+    @property
+    def emission_calculator(self):
+        def factory():
+            from models.emission_calculator import EmissionCalculator
+            return EmissionCalculator()
+        return self._get_component('emission_calculator', factory)
+    
+    @property
+    def meal_planner(self):
+        def factory():
+            from models.meal_planner import MealPlanner
+            return MealPlanner(self.recipe_recommender, self.emission_calculator)
+        return self._get_component('meal_planner', factory)
+    
+    @property
+    def leaderboard(self):
+        def factory():
+            from models.leaderboard import Leaderboard
+            return Leaderboard(flush_interval_ms=self.leaderboard_flush_ms,
+                               refresh_interval_ms=self.leaderboard_flush_ms)
+        return self._get_component('leaderboard', factory)
+    
+    def preload(self, training_data=None):
+        """
+        Build the read-only components ahead of the first request
+        
+        Meant to run in a server's master process before it forks workers,
+        so the food catalog, recipe catalog, emission factors, detector
+        weights and fitted forecast model are shared copy-on-write. The
+        leaderboard is left out because its log file and flusher thread
+        belong to each worker.
+        
+        Args:
+            training_data (str): Optional waste history CSV to fit (or load
+                from the model store) the forecast model on
+        """
+        self.image_analyzer
+        self.recipe_recommender
+        self.emission_calculator
+        self.meal_planner
+        predictor = self.waste_predictor
+        if training_data is not None:
+            predictor.prepare_data(training_data)
+            predictor.train_model()
     
     def analyze_fridge_image(self, image_path):
         """
         Complete analysis of a fridge image
         
         Args:
-            image_path (str): Path to the fridge image
-            
+            image_path (str): Path to the fridge image, or its encoded bytes
+        
         Returns:
             dict: Complete analysis results
         """
+        from models.inventory import Inventory
+        
         # 1. Analyze image to detect food items
         food_items = self.image_analyzer.analyze_image(image_path)
         
+        # Find the expiring items once and share them with every component
+        inventory = Inventory(food_items, self.expiry_threshold)
+        
         # 2. Predict waste based on detected items
-        waste_prediction = self.waste_predictor.calculate_waste_from_items(food_items)
+        waste_prediction = self.waste_predictor.calculate_waste_from_items(inventory)
         
         # 3. Recommend recipes for expiring items
-        recipes = self.recipe_recommender.recommend_recipes(food_items)
+        recipes = self.recipe_recommender.recommend_recipes(inventory, top_k=self.recipe_top_k)
         
         # 4. Calculate avoided emissions
-        emission_results = self.emission_calculator.calculate_avoided_emissions(food_items)
+        emission_results = self.emission_calculator.calculate_avoided_emissions(inventory)
         
         # 5. Compile results
         results = {
@@ -48,6 +159,69 @@ class FoodPrintForecast:
         
         return results
     
+    def plan_meals(self, food_items, days=3, meals_per_day=1):
+        """
+        Plan which recipes to cook over the next days to use up expiring food
+        
+        Args:
+            food_items (list): Detected food items
+            days (int): Number of days to plan
+            meals_per_day (int): Number of recipes per day
+        
+        Returns:
+            dict: Planned recipes per day and the emissions they avoid
+        """
+        from models.inventory import Inventory
+        
+        inventory = Inventory(food_items, self.expiry_threshold)
+        return self.meal_planner.plan_meals(inventory, days=days, meals_per_day=meals_per_day)
+    
+    def analyze_batch(self, items_per_household, expiry_threshold=None):
+        """
+        Analyze the inventories of many households in vectorized passes
+        
+        Items are converted once into a columnar inventory, then expiring
+        counts, waste percentages and avoided emissions are computed for all
+        households at once instead of one fridge at a time.
+        
+        Args:
+            items_per_household (dict or list): Household id -> list of
+                detected food items. A list uses positions as household ids
+            expiry_threshold (int): Items expiring within this many days are
+                counted as expiring soon. Defaults to the system's threshold
+        
+        Returns:
+            DataFrame: One row per household with total_items, expiring_soon,
+            estimated_waste_percentage and avoided_emissions_kg
+        """
+        import numpy as np
+        import pandas as pd
+        from models.inventory import InventoryBatch
+        
+        if expiry_threshold is None:
+            expiry_threshold = self.expiry_threshold
+        batch = InventoryBatch.from_households(items_per_household)
+        expiring_quantity = batch.quantity * batch.expiring_mask(expiry_threshold)
+        food_codes = self.emission_calculator.encode_foods(batch.names)[batch.name_codes]
+        
+        total_items = batch.sum_by_household(batch.quantity)
+        expiring_soon = batch.sum_by_household(expiring_quantity)
+        avoided_emissions = self.emission_calculator.calculate_avoided_emissions_batch(
+            food_codes, expiring_quantity, groups=batch.household, n_groups=len(batch.household_ids)
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            waste_percentage = np.where(total_items > 0, expiring_soon / total_items * 100, 0.0)
+        # Rounded like calculate_avoided_emissions: np.round scales by 100
+        # first, so ties such as 3.825 can land on the other side
+        avoided_emissions_kg = [round(value, 2) for value in avoided_emissions.tolist()]
+        
+        return pd.DataFrame({
+            'total_items': total_items,
+            'expiring_soon': expiring_soon,
+            'estimated_waste_percentage': waste_percentage,
+            'avoided_emissions_kg': avoided_emissions_kg
+        }, index=pd.Index(batch.household_ids, name='household_id'))
+    
     def add_user_contribution(self, username, emission_results):
         """
         Add user's contribution to leaderboard
@@ -62,13 +236,59 @@ class FoodPrintForecast:
             emission_results['items_saved']
         )
     
+    def add_user_contributions(self, contributions):
+        """
+        Add many users' contributions to the leaderboard in one batch
+        
+        Args:
+            contributions (iterable): Dicts with 'username' and
+                'emission_results' (results from emission calculation)
+        
+        Returns:
+            dict: 'accepted' count and 'errors', a list of {'index', 'error'}
+                for every rejected contribution
+        """
+        errors = []
+        records = []
+        indices = []
+        for index, contribution in enumerate(contributions):
+            try:
+                emission_results = contribution['emission_results']
+                records.append((
+                    contribution['username'],
+                    emission_results['avoided_emissions_kg'],
+                    emission_results['items_saved']
+                ))
+                indices.append(index)
+            except (KeyError, TypeError) as e:
+                errors.append({'index': index, 'error': f"missing or invalid field: {e}"})
+        
+        result = self.leaderboard.add_user_contributions(records)
+        # Report positions in the caller's list, not in the filtered one
+        errors.extend({'index': indices[error['index']], 'error': error['error']} for error in result['errors'])
+        errors.sort(key=lambda error: error['index'])
+        return {'accepted': result['accepted'], 'errors': errors}
+    
+    def close(self):
+        """
+        Release the threads and files held by the components built so far
+        
+        The image analyzer's decode threads are stopped and the leaderboard
+        writes its pending contributions. Both keep working if used again.
+        """
+        with self._lock:
+            components = list(self._components.values())
+        for component in components:
+            if hasattr(component, 'close'):
+                component.close()
+    
     def get_leaderboard(self, limit=10):
         """
         Get community leaderboard
         
         Args:
             limit (int): Number of top users to return
-            
+        
         Returns:
             list: Top users on leaderboard
         """
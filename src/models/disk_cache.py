@@ -0,0 +1,98 @@
+"""
+Size-bounded on-disk cache with least-recently-used eviction
+"""
+import os
+import tempfile
+
+class DiskLRUCache:
+    def __init__(self, directory, max_entries=32, suffix='.bin'):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.directory = directory
+        self.max_entries = max_entries
+        self.suffix = suffix
+        os.makedirs(self.directory, exist_ok=True)
+    
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+    
+    def get(self, key):
+        """
+        Read a cached entry and mark it as recently used
+        
+        Args:
+            key (str): Entry key (must be safe to use as a file name)
+            
+        Returns:
+            bytes: Cached data or None on a miss
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            # The modification time doubles as the access time for eviction
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return data
+    
+    def put(self, key, data):
+        """
+        Store an entry and evict the least recently used ones over the limit
+        
+        Args:
+            key (str): Entry key (must be safe to use as a file name)
+            data (bytes): Data to store
+        """
+        # Write to a temporary file first so readers never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._evict()
+    
+    def invalidate(self, key=None):
+        """
+        Remove one entry, or every entry when no key is given
+        
+        Args:
+            key (str): Entry key. If None, the whole cache is cleared
+        """
+        keys = [key] if key is not None else self.keys()
+        for k in keys:
+            try:
+                os.remove(self._path(k))
+            except FileNotFoundError:
+                pass
+    
+    def keys(self):
+        """List the keys of every cached entry"""
+        return [name[:-len(self.suffix)] for name in os.listdir(self.directory) if name.endswith(self.suffix)]
+    
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+    
+    def __len__(self):
+        return len(self.keys())
+    
+    def _evict(self):
+        """Remove the least recently used entries beyond max_entries"""
+        entries = []
+        for key in self.keys():
+            try:
+                entries.append((os.path.getmtime(self._path(key)), key))
+            except FileNotFoundError:
+                continue
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, key in entries[:len(entries) - self.max_entries]:
+            self.invalidate(key)
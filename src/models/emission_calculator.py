@@ -1,54 +1,71 @@
 """
 Module to calculate avoided carbon emissions
 """
+import numpy as np
+from models.food_catalog import get_food_catalog, DEFAULT_FOOTPRINT
+from models.inventory import Inventory, ExpiringStock
+
 class EmissionCalculator:
-    def __init__(self):
+    def __init__(self, food_catalog=None):
+        """
+        Args:
+            food_catalog (FoodCatalog): Source of the emission factors.
+                Defaults to the shared catalog of data/food_database.csv
+        """
         # Carbon footprint data (kg CO2 equivalent per kg of food)
         # Source: https://www.sciencedirect.com/science/article/pii/S0959652616303584
-        self.carbon_footprints = {
-            'tomato': 1.1,  # kg CO2/kg
-            'banana': 0.9,
-            'apple': 0.5,
-            'milk': 1.5,
-            'bread': 1.0,
-            'egg': 0.8,
-            'chicken': 3.2,
-            'lettuce': 0.3,
-            'rice': 2.7,
-            'pasta': 1.2,
-            'cheese': 8.5,
-            'beef': 27.0,
-            'pork': 6.1,
-            'fish': 3.9
-        }
+        self.food_catalog = food_catalog or get_food_catalog()
+    
+    @property
+    def emission_factors(self):
+        """Carbon footprint indexed by food id"""
+        return self.food_catalog.emission_factors
+    
+    @property
+    def unknown_food_code(self):
+        return self.food_catalog.unknown_id
     
     def calculate_avoided_emissions(self, food_items, recipes_used=None):
         """
         Calculate the carbon emissions avoided by using expiring food
         
+        Without recipes, every expiring item counts as saved. With recipes,
+        only the expiring units they consume count: each recipe uses one unit
+        (or the fractional rest) of each of its ingredients, on the recipe's
+        'day' (0 if absent), taken from the item expiring first among those
+        still good that day.
+        
         Args:
-            food_items (list): List of food items that were about to expire
+            food_items (list or Inventory): Detected food items
             recipes_used (list): List of recipes that were used (optional)
-            
+        
         Returns:
             dict: Emission calculation results
         """
-        # Calculate emissions for expiring items (would be wasted)
-        expiring_items = [item for item in food_items if item['days_until_expiry'] <= 3]
-        avoided_emissions = 0
+        inventory = Inventory.from_items(food_items)
+        
+        if recipes_used is None:
+            # Calculate emissions for expiring items (would be wasted)
+            saved_quantities = [(item['name'], item['quantity']) for item in inventory.expiring_items]
+        else:
+            stock = ExpiringStock(inventory)
+            saved_quantities = []
+            for recipe in sorted(recipes_used, key=lambda recipe: recipe.get('day', 0)):
+                for ingredient in set(recipe['ingredients']):
+                    used = stock.consume(ingredient, recipe.get('day', 0))
+                    if used:
+                        saved_quantities.append((ingredient, used))
         
-        for item in expiring_items:
-            food_name = item['name']
-            quantity = item['quantity']
-            
+        avoided_emissions = 0
+        for food_name, quantity in saved_quantities:
             # Get carbon footprint per item (simplified)
             # In a real implementation, we would consider item weight
-            footprint = self.carbon_footprints.get(food_name, 1.0)
+            footprint = self.get_food_footprint(food_name)
             avoided_emissions += footprint * quantity
         
         # Calculate total items and percentage
-        total_items = sum([item['quantity'] for item in food_items])
-        expiring_count = sum([item['quantity'] for item in expiring_items])
+        total_items = inventory.total_quantity
+        expiring_count = sum(quantity for _, quantity in saved_quantities)
         
         return {
             'avoided_emissions_kg': round(avoided_emissions, 2),
@@ -59,7 +76,48 @@ class EmissionCalculator:
     
     def get_food_footprint(self, food_name):
         """Get the carbon footprint of a specific food item"""
-        return self.carbon_footprints.get(food_name, 1.0)
+        record = self.food_catalog.get(food_name)
+        return DEFAULT_FOOTPRINT if record is None else record.carbon_footprint
+    
+    def get_food_footprints(self, food_names):
+        """Get the carbon footprints of several food items as an array"""
+        return self.emission_factors[self.encode_foods(food_names)]
+    
+    def encode_foods(self, food_names):
+        """
+        Convert food names to codes of the emission factor table
+        
+        Args:
+            food_names (list): Food names
+        
+        Returns:
+            ndarray: Food ids, with unknown foods mapped to unknown_food_code
+        """
+        return self.food_catalog.encode(food_names)
+    
+    def calculate_avoided_emissions_batch(self, food_codes, quantities, weights=None, groups=None, n_groups=None):
+        """
+        Calculate avoided emissions for many items at once
+        
+        Args:
+            food_codes (ndarray): Food code of each item, from encode_foods()
+            quantities (ndarray): Number of units of each item
+            weights (ndarray): Weight of one unit of each item in kg. If None,
+                every unit counts as 1 kg like calculate_avoided_emissions
+            groups (ndarray): Optional non-negative group index of each item
+                (e.g. household) to total the emissions per group
+            n_groups (int): Number of groups. Defaults to the largest group + 1
+        
+        Returns:
+            float or ndarray: Total emissions avoided in kg CO2, or the totals
+            per group when groups are given
+        """
+        emissions = self.emission_factors[food_codes] * quantities
+        if weights is not None:
+            emissions *= weights
+        if groups is None:
+            return float(emissions.sum())
+        return np.bincount(groups, weights=emissions, minlength=n_groups or 0)
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+"""
+Shared reference catalog of known foods
+
+The food database is loaded once per process and shared by every
+component. Each food gets a compact integer id so hot paths compare and
+index by id instead of by name.
+"""
+import csv
+import os
+from functools import lru_cache
+import numpy as np
+
+FOOD_DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'food_database.csv')
+
+# Footprint assumed for foods missing from the database (kg CO2/kg)
+DEFAULT_FOOTPRINT = 1.0
+
+class FoodRecord:
+    """Immutable reference data of one food"""
+    
+    __slots__ = ('food_id', 'name', 'local_name', 'shelf_life_days', 'carbon_footprint')
+    
+    def __init__(self, food_id, name, local_name, shelf_life_days, carbon_footprint):
+        object.__setattr__(self, 'food_id', food_id)
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'local_name', local_name)
+        object.__setattr__(self, 'shelf_life_days', shelf_life_days)
+        object.__setattr__(self, 'carbon_footprint', carbon_footprint)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("FoodRecord is immutable")
+    
+    def __repr__(self):
+        return f"FoodRecord({self.food_id}, {self.name!r})"
+
+class FoodCatalog:
+    def __init__(self, records):
+        """
+        Args:
+            records (list): FoodRecord objects whose food_id is their position
+        """
+        self.records = tuple(records)
+        self.ids = {record.name: record.food_id for record in self.records}
+        # Id used for foods that are not in the catalog
+        self.unknown_id = len(self.records)
+        # Carbon footprint (kg CO2/kg) indexed by food id, unknown_id included
+        self.emission_factors = np.array(
+            [record.carbon_footprint for record in self.records] + [DEFAULT_FOOTPRINT], dtype=np.float64
+        )
+        self.emission_factors.setflags(write=False)
+    
+    @classmethod
+    def load(cls, food_database_path=FOOD_DATABASE_PATH):
+        """
+        Load the catalog from the food database CSV
+        
+        Args:
+            food_database_path (str): Path to the food database
+            
+        Returns:
+            FoodCatalog: Loaded catalog
+        """
+        with open(food_database_path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        return cls(
+            FoodRecord(
+                food_id,
+                row['english_name'],
+                row['name'],
+                int(row['shelf_life_days']),
+                float(row['carbon_footprint_kg_co2_per_kg'])
+            )
+            for food_id, row in enumerate(rows)
+        )
+    
+    def food_id(self, name):
+        """Get the id of a food, or unknown_id if it is not in the catalog"""
+        return self.ids.get(name, self.unknown_id)
+    
+    def encode(self, names):
+        """Convert food names to an array of food ids"""
+        return np.fromiter((self.ids.get(name, self.unknown_id) for name in names), dtype=np.int32, count=len(names))
+    
+    def get(self, name):
+        """Get the record of a food by name, or None if it is not in the catalog"""
+        food_id = self.ids.get(name)
+        return None if food_id is None else self.records[food_id]
+    
+    def __getitem__(self, food_id):
+        return self.records[food_id]
+    
+    def __contains__(self, name):
+        return name in self.ids
+    
+    def __len__(self):
+        return len(self.records)
+
+@lru_cache(maxsize=None)
+def get_food_catalog(food_database_path=FOOD_DATABASE_PATH):
+    """Get the process-wide catalog loaded from the given food database"""
+    return FoodCatalog.load(food_database_path)
@@ -1,73 +1,240 @@
 """
 Image recognition module for identifying food items in fridge photos
 """
+import hashlib
+import io
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 import cv2
 import numpy as np
 from PIL import Image
+from models.food_catalog import get_food_catalog
+from models.inference import DETECTOR_MODEL_PATH, decode_detections, load_backend
+from models.inventory import FoodItem, serialize_items
+
+# Reduced-resolution JPEG decode modes by downscale factor, largest first
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2)
+)
+
+def _decode_flag(image_size, input_size):
+    """
+    Pick the largest decode reduction that still covers the detector input
+    
+    Args:
+        image_size (tuple): Stored (width, height) of the image
+        input_size (tuple): Detector input (height, width)
+    
+    Returns:
+        int: cv2.imread flag
+    """
+    needed = max(input_size)
+    for factor, flag in REDUCED_DECODE_FLAGS:
+        if min(image_size) // factor >= needed:
+            return flag
+    return cv2.IMREAD_COLOR
 
 class FridgeImageAnalyzer:
-    def __init__(self):
-        # TODO: Load pre-trained food recognition model
-        # For now, we'll use a placeholder
-        self.model = None
-        self.food_database = self._load_food_database()
+    def __init__(self, food_catalog=None, model_path=DETECTOR_MODEL_PATH, batch_size=8, decode_workers=None,
+                 result_cache=None):
+        """
+        Args:
+            food_catalog (FoodCatalog): Reference food data. Defaults to the
+                shared catalog
+            model_path (str): Detector model (.npz or .onnx). Weights are
+                loaded once per process and shared by every analyzer
+            batch_size (int): Maximum number of images per forward pass
+            decode_workers (int): Threads decoding images for the detector.
+                Defaults to the CPU count, at most 4; 0 decodes on the
+                calling thread
+            result_cache (DiskLRUCache): Optional store of detection results
+                keyed by image content and model version
+        """
+        self.model = load_backend(model_path)
+        self.food_catalog = food_catalog or get_food_catalog()
+        self.batch_size = batch_size
+        self.decode_workers = min(4, os.cpu_count() or 1) if decode_workers is None else decode_workers
+        self._executor = None
+        self.result_cache = result_cache
+        height, width = self.model.input_size
+        # Two input tensors reused by every forward pass: the detector runs
+        # on one while the decode workers fill the other, which bounds the
+        # decoded images waiting for the detector to a single batch. The
+        # lock serializes requests that share the analyzer
+        self._inputs = np.empty((2, batch_size, height, width, 3), dtype=np.float32)
+        self._lock = threading.Lock()
     
-    def _load_food_database(self):
-        """Load database of known food items"""
-        # This would typically load from a database or file
-        food_items = {
-            'tomato': {'name': 'Tomat', 'shelf_life': 7, 'carbon_footprint': 1.1},
-            'banana': {'name': 'Pisang', 'shelf_life': 5, 'carbon_footprint': 0.9},
-            'apple': {'name': 'Apel', 'shelf_life': 30, 'carbon_footprint': 0.5},
-            'milk': {'name': 'Susu', 'shelf_life': 7, 'carbon_footprint': 1.5},
-            'bread': {'name': 'Roti', 'shelf_life': 5, 'carbon_footprint': 1.0},
-            'egg': {'name': 'Telur', 'shelf_life': 21, 'carbon_footprint': 0.8},
-            'chicken': {'name': 'Ayam', 'shelf_life': 2, 'carbon_footprint': 3.2},
-            'lettuce': {'name': 'Selada', 'shelf_life': 3, 'carbon_footprint': 0.3},
-        }
-        return food_items
+    @property
+    def model_version(self):
+        """Identifier of the loaded detector weights"""
+        return self.model.version
     
     def analyze_image(self, image_path):
         """
         Analyze a fridge image and identify food items
         
         Args:
-            image_path (str): Path to the fridge image
-            
+            image_path (str): Path to the fridge image, or its encoded bytes
+        
         Returns:
             list: List of identified food items with quantities
         """
-        # Load image
-        image = cv2.imread(image_path)
-        if image is None:
-            raise ValueError(f"Could not load image from {image_path}")
+        return self.analyze_images([image_path])[0]
+    
+    def analyze_images(self, image_paths):
+        """
+        Analyze several fridge images, batching them through the detector
         
-        # TODO: Implement actual food recognition using ML model
-        # For now, we'll return sample data
-        detected_items = self._mock_detection()
+        Images analyzed before are answered from the result cache without
+        being decoded.
         
-        return detected_items
+        Args:
+            image_paths (list): Paths to the fridge images, or their
+                encoded bytes
+        
+        Returns:
+            list: One list of identified food items per image
+        """
+        if self.result_cache is None:
+            return self._detect(image_paths)
+        
+        # Hashing needs the bytes anyway, so misses are decoded from memory
+        images = [self._read(image) for image in image_paths]
+        keys = [self._cache_key(image) for image in images]
+        results = [self._cached_items(key) for key in keys]
+        misses = [i for i, items in enumerate(results) if items is None]
+        for i, items in zip(misses, self._detect([images[i] for i in misses])):
+            results[i] = items
+            self.result_cache.put(keys[i], json.dumps(serialize_items(items)).encode('utf-8'))
+        return results
+    
+    def _cache_key(self, image):
+        """Content address of an encoded image under the loaded model"""
+        digest = hashlib.sha256()
+        digest.update(self.model_version.encode())
+        digest.update(b'\0')
+        digest.update(image)
+        return digest.hexdigest()
+    
+    def _cached_items(self, key):
+        """Detected items stored under key, or None on a miss"""
+        data = self.result_cache.get(key)
+        if data is None:
+            return None
+        try:
+            return [FoodItem.from_dict(item) for item in json.loads(data)]
+        except (ValueError, KeyError, TypeError):
+            # A corrupt entry is treated as a miss
+            self.result_cache.invalidate(key)
+            return None
     
-    def _mock_detection(self):
-        """Mock detection for demonstration purposes"""
-        # In a real implementation, this would use a trained ML model
-        # to detect food items in the image
-        return [
-            {'name': 'tomato', 'quantity': 3, 'days_until_expiry': 2},
-            {'name': 'banana', 'quantity': 2, 'days_until_expiry': 1},
-            {'name': 'bread', 'quantity': 1, 'days_until_expiry': 3},
-            {'name': 'milk', 'quantity': 1, 'days_until_expiry': 5}
-        ]
+    @staticmethod
+    def _read(image):
+        """Encoded bytes of an image given as a path or as bytes"""
+        if isinstance(image, bytes):
+            return image
+        try:
+            with open(image, 'rb') as f:
+                return f.read()
+        except OSError:
+            raise ValueError(f"Could not load image from {image}")
+    
+    def _detect(self, image_paths):
+        """Decode images and run them through the detector in batches"""
+        chunks = [image_paths[start:start + self.batch_size] for start in range(0, len(image_paths), self.batch_size)]
+        results = []
+        with self._lock:
+            pending = self._submit(chunks[0], self._inputs[0]) if chunks else []
+            try:
+                for index, chunk in enumerate(chunks):
+                    for future in pending:
+                        future.result()
+                    pending = []
+                    if index + 1 < len(chunks):
+                        # Decode the next batch while this one is inferred
+                        pending = self._submit(chunks[index + 1], self._inputs[(index + 1) % 2])
+                    outputs = self.model.run(self._inputs[index % 2][:len(chunk)])
+                    results.extend(self._to_items(decode_detections(outputs, self.model.labels)))
+            finally:
+                # Workers must be done writing before another request may
+                # use the input tensors
+                wait(pending)
+        return results
+    
+    def _submit(self, image_paths, inputs):
+        """Start decoding images into consecutive rows of inputs"""
+        if self.decode_workers == 0 or len(image_paths) == 1:
+            futures = []
+            for i, image_path in enumerate(image_paths):
+                future = Future()
+                try:
+                    future.set_result(self._load_image(image_path, inputs[i]))
+                except Exception as e:
+                    future.set_exception(e)
+                futures.append(future)
+            return futures
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.decode_workers, thread_name_prefix='image-decode')
+        return [self._executor.submit(self._load_image, image_path, inputs[i]) for i, image_path in enumerate(image_paths)]
+    
+    def close(self):
+        """Stop the decode threads; a later analysis starts new ones"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+    
+    def _load_image(self, image_path, out):
+        """Decode an image at the lowest sufficient resolution into out"""
+        in_memory = isinstance(image_path, bytes)
+        try:
+            # Only the header is read to learn the stored size
+            with Image.open(io.BytesIO(image_path) if in_memory else image_path) as image:
+                flag = _decode_flag(image.size, self.model.input_size)
+        except (OSError, ValueError):
+            flag = cv2.IMREAD_COLOR
+        
+        if in_memory:
+            image = cv2.imdecode(np.frombuffer(image_path, dtype=np.uint8), flag)
+            if image is None:
+                raise ValueError("Could not decode image")
+        else:
+            image = cv2.imread(image_path, flag)
+            if image is None:
+                raise ValueError(f"Could not load image from {image_path}")
+        self._preprocess(image, out)
+    
+    def _preprocess(self, image, out):
+        """Resize a BGR image to the detector input and scale it into out"""
+        height, width = self.model.input_size
+        resized = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(resized, cv2.COLOR_BGR2RGB, dst=resized)
+        np.multiply(resized, 1 / 255, out=out, casting='unsafe')
+    
+    @staticmethod
+    def _to_items(detections):
+        return [[FoodItem(name, quantity, days) for name, quantity, days in image] for image in detections]
     
     def get_food_info(self, food_name):
         """Get information about a food item"""
-        return self.food_database.get(food_name, None)
+        record = self.food_catalog.get(food_name)
+        if record is None:
+            return None
+        return {
+            'name': record.local_name,
+            'shelf_life': record.shelf_life_days,
+            'carbon_footprint': record.carbon_footprint
+        }
 
 # Example usage
 if __name__ == "__main__":
     analyzer = FridgeImageAnalyzer()
-    # For testing without actual image
-    items = analyzer._mock_detection()
+    items = analyzer.analyze_image('data/uploads/indomie.jpg')
     print("Detected items:")
     for item in items:
         info = analyzer.get_food_info(item['name'])
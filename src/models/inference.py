@@ -0,0 +1,141 @@
+"""
+CPU inference backends for the fridge food detector
+
+A detector model maps a batch of preprocessed images to one presence
+score, quantity and days-until-expiry estimate per known food. Model
+weights are loaded once per process and shared by every analyzer.
+"""
+import hashlib
+import os
+from functools import lru_cache
+import numpy as np
+
+DETECTOR_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'food_detector.npz')
+
+def _file_digest(path):
+    """Short content hash identifying a model file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+class NumpyBackend:
+    """Linear detector stored as a .npz file and evaluated with NumPy"""
+    
+    def __init__(self, model_path):
+        """
+        Args:
+            model_path (str): .npz file with 'weights' (features x 3 * foods),
+                'bias', 'labels' and 'input_size' (height, width) arrays
+        """
+        with np.load(model_path) as data:
+            self.weights = data['weights'].astype(np.float32)
+            self.bias = data['bias'].astype(np.float32)
+            self.labels = [str(label) for label in data['labels']]
+            self.input_size = tuple(int(size) for size in data['input_size'])
+        # The arrays are shared between threads and analyzers
+        self.weights.setflags(write=False)
+        self.bias.setflags(write=False)
+        self.version = _file_digest(model_path)
+    
+    def run(self, inputs):
+        """
+        Run one forward pass
+        
+        Args:
+            inputs (ndarray): float32 batch of shape (n, height, width, 3)
+        
+        Returns:
+            ndarray: Raw outputs of shape (n, 3 * len(labels))
+        """
+        return inputs.reshape(len(inputs), -1) @ self.weights + self.bias
+
+class OnnxBackend:
+    """Detector exported to ONNX and evaluated with onnxruntime"""
+    
+    def __init__(self, model_path):
+        """
+        Args:
+            model_path (str): .onnx file whose metadata holds 'labels'
+                (comma separated) and 'input_size' ('height,width')
+        """
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ValueError(f"onnxruntime is required to load {model_path}")
+        
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.labels = metadata['labels'].split(',')
+        self.input_size = tuple(int(size) for size in metadata['input_size'].split(','))
+        self.input_name = self.session.get_inputs()[0].name
+        self.version = _file_digest(model_path)
+    
+    def run(self, inputs):
+        """
+        Run one forward pass
+        
+        Args:
+            inputs (ndarray): float32 batch of shape (n, height, width, 3)
+        
+        Returns:
+            ndarray: Raw outputs of shape (n, 3 * len(labels))
+        """
+        return self.session.run(None, {self.input_name: inputs})[0]
+
+BACKENDS = {
+    '.npz': NumpyBackend,
+    '.onnx': OnnxBackend
+}
+
+@lru_cache(maxsize=None)
+def load_backend(model_path=DETECTOR_MODEL_PATH):
+    """
+    Load a detector model, once per process and path
+    
+    Args:
+        model_path (str): Model file; its extension selects the backend
+    
+    Returns:
+        NumpyBackend or OnnxBackend: Loaded backend
+    """
+    extension = os.path.splitext(model_path)[1].lower()
+    if extension not in BACKENDS:
+        raise ValueError(f"Unsupported detector model format: {model_path}")
+    if not os.path.exists(model_path):
+        raise ValueError(f"Detector model not found at {model_path}")
+    return BACKENDS[extension](model_path)
+
+def decode_detections(outputs, labels):
+    """
+    Turn raw detector outputs into detected food items
+    
+    Args:
+        outputs (ndarray): Raw outputs of shape (n, 3 * len(labels))
+        labels (list): Food name of each detector class
+    
+    Returns:
+        list: One list of (name, quantity, days_until_expiry) tuples per
+            image, most confident detection first
+    """
+    presence, quantity, days = np.asarray(outputs).reshape(len(outputs), 3, len(labels)).transpose(1, 0, 2)
+    quantity = np.maximum(np.rint(quantity), 1).astype(int)
+    days = np.rint(days).astype(int)
+    
+    detections = []
+    for i in range(len(outputs)):
+        found = np.flatnonzero(presence[i] > 0)
+        found = found[np.argsort(-presence[i, found], kind='stable')]
+        detections.append([(labels[c], int(quantity[i, c]), int(days[i, c])) for c in found])
+    return detections
+
+# Example usage
+if __name__ == "__main__":
+    backend = load_backend()
+    height, width = backend.input_size
+    batch = np.random.rand(2, height, width, 3).astype(np.float32)
+    for detections in decode_detections(backend.run(batch), backend.labels):
+        print(detections)
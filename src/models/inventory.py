@@ -0,0 +1,224 @@
+"""
+Compact representations of detected food inventories
+
+Single fridges use FoodItem records and batches of households use the
+columnar InventoryBatch. Both can be read like the item dicts
+({'name', 'quantity', 'days_until_expiry'}) used throughout the pipeline,
+but the per-fridge components reject a whole batch, which would merge its
+households into one fridge; pass them one household's items instead.
+"""
+import numpy as np
+
+# Items expiring within this many days are considered at risk of being wasted
+EXPIRY_THRESHOLD_DAYS = 3
+
+class FoodItem:
+    """One detected food item, readable like an item dict"""
+    
+    __slots__ = ('name', 'quantity', 'days_until_expiry')
+    
+    def __init__(self, name, quantity, days_until_expiry):
+        self.name = name
+        self.quantity = quantity
+        self.days_until_expiry = days_until_expiry
+    
+    @classmethod
+    def from_dict(cls, item):
+        return cls(item['name'], item['quantity'], item['days_until_expiry'])
+    
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+    
+    def keys(self):
+        return self.__slots__
+    
+    def to_dict(self):
+        """Convert to a JSON-serializable item dict"""
+        return {'name': self.name, 'quantity': self.quantity, 'days_until_expiry': self.days_until_expiry}
+    
+    def __eq__(self, other):
+        if isinstance(other, (FoodItem, dict)):
+            return all(self[key] == other.get(key) for key in self.__slots__) and len(other.keys()) == len(self.__slots__)
+        return NotImplemented
+    
+    # Records are mutable and compare equal to item dicts, which cannot be
+    # hashed either, so like dicts they are deliberately unhashable. Use
+    # item.name (or the food id) as a set member or dict key instead
+    __hash__ = None
+    
+    def __repr__(self):
+        return f"FoodItem({self.name!r}, {self.quantity!r}, {self.days_until_expiry!r})"
+
+def serialize_items(food_items):
+    """
+    Convert detected items to JSON-serializable dicts
+    
+    Args:
+        food_items (list, Inventory or InventoryBatch): Detected food items
+    
+    Returns:
+        list: Item dicts
+    """
+    return [item.to_dict() if isinstance(item, FoodItem) else dict(item) for item in food_items]
+
+class Inventory:
+    """Detected items of one fridge with the expiring subset precomputed"""
+    
+    def __init__(self, food_items, expiry_threshold=EXPIRY_THRESHOLD_DAYS):
+        if isinstance(food_items, InventoryBatch):
+            raise TypeError("An InventoryBatch holds many households; pass batch.household_items(household_id) "
+                            "or analyze it with FoodPrintForecast.analyze_batch()")
+        self.items = list(food_items)
+        self.expiry_threshold = expiry_threshold
+        self.expiring_items = [item for item in self.items if item['days_until_expiry'] <= expiry_threshold]
+        self.total_quantity = sum(item['quantity'] for item in self.items)
+        self.expiring_quantity = sum(item['quantity'] for item in self.expiring_items)
+        self.expiring_quantity_by_name = {}
+        for item in self.expiring_items:
+            self.expiring_quantity_by_name[item['name']] = self.expiring_quantity_by_name.get(item['name'], 0) + item['quantity']
+        self.expiring_names = set(self.expiring_quantity_by_name)
+    
+    @classmethod
+    def from_items(cls, food_items, expiry_threshold=EXPIRY_THRESHOLD_DAYS):
+        """
+        Build an inventory unless the items already are one
+        
+        Args:
+            food_items (list or Inventory): Detected food items
+            expiry_threshold (int): Threshold used when building a new inventory
+        
+        Returns:
+            Inventory: Precomputed inventory
+        
+        Raises:
+            TypeError: If food_items is an InventoryBatch
+        """
+        if isinstance(food_items, cls):
+            return food_items
+        return cls(food_items, expiry_threshold)
+    
+    def __iter__(self):
+        return iter(self.items)
+    
+    def __len__(self):
+        return len(self.items)
+
+class ExpiringStock:
+    """
+    Remaining units of the expiring items of an inventory
+    
+    Using an ingredient on a given day consumes one unit of the matching
+    item that expires first among those still good on that day (day 0 is
+    today), or what is left of it when less than a unit remains.
+    """
+    
+    def __init__(self, inventory):
+        self._lots = {}
+        for item in sorted(inventory.expiring_items, key=lambda item: item['days_until_expiry']):
+            self._lots.setdefault(item['name'], []).append([item['days_until_expiry'], item['quantity']])
+    
+    def _lot(self, name, day):
+        for lot in self._lots.get(name, ()):
+            if lot[0] >= day and lot[1] > 0:
+                return lot
+        return None
+    
+    def available(self, name, day=0):
+        """Whether a unit of the item is still good and unused on the given day"""
+        return self._lot(name, day) is not None
+    
+    def consume(self, name, day=0):
+        """
+        Use one unit of an item
+        
+        Returns:
+            float: Amount consumed: 1, less for the rest of a fractional
+                quantity (e.g. the last 0.5 kg of rice), or 0 if none was
+                available
+        """
+        lot = self._lot(name, day)
+        if lot is None:
+            return 0
+        used = min(1, lot[1])
+        lot[1] -= used
+        return used
+
+class InventoryBatch:
+    """Struct-of-arrays view of the detected items of many households"""
+    
+    def __init__(self, household_ids, household, names, name_codes, quantity, days_until_expiry):
+        self.household_ids = household_ids
+        self.household = household
+        self.names = names
+        self.name_codes = name_codes
+        self.quantity = quantity
+        self.days_until_expiry = days_until_expiry
+    
+    @classmethod
+    def from_households(cls, items_per_household):
+        """
+        Flatten per-household item lists into NumPy columns
+        
+        Args:
+            items_per_household (dict or list): Household id -> list of
+                detected food items. A list uses positions as household ids
+        
+        Returns:
+            InventoryBatch: Columnar inventory of every household
+        """
+        if not isinstance(items_per_household, dict):
+            items_per_household = dict(enumerate(items_per_household))
+        
+        household_ids = list(items_per_household)
+        counts = [len(items) for items in items_per_household.values()]
+        items = [item for household_items in items_per_household.values() for item in household_items]
+        
+        household = np.repeat(np.arange(len(household_ids), dtype=np.int32), counts)
+        # Intern names so per-name lookups happen once per distinct food
+        codes = {}
+        name_codes = np.fromiter((codes.setdefault(item['name'], len(codes)) for item in items), dtype=np.int32, count=len(items))
+        # Quantities may be fractional (e.g. kilograms), so they stay float64
+        # to match the per-fridge components exactly
+        quantity = np.fromiter((item['quantity'] for item in items), dtype=np.float64, count=len(items))
+        days = np.fromiter((item['days_until_expiry'] for item in items), dtype=np.int32, count=len(items))
+        return cls(household_ids, household, list(codes), name_codes, quantity, days)
+    
+    def __len__(self):
+        return len(self.quantity)
+    
+    def __iter__(self):
+        """Iterate over every item as a FoodItem record"""
+        for code, quantity, days in zip(self.name_codes.tolist(), self.quantity.tolist(), self.days_until_expiry.tolist()):
+            yield FoodItem(self.names[code], quantity, days)
+    
+    @property
+    def nbytes(self):
+        """Memory held by the item columns"""
+        return self.household.nbytes + self.name_codes.nbytes + self.quantity.nbytes + self.days_until_expiry.nbytes
+    
+    def household_items(self, household_id):
+        """Get the items of one household as FoodItem records"""
+        index = self.household_ids.index(household_id)
+        rows = np.flatnonzero(self.household == index)
+        return [FoodItem(self.names[self.name_codes[row]], float(self.quantity[row]), int(self.days_until_expiry[row]))
+                for row in rows]
+    
+    def to_dict(self):
+        """Convert to a JSON-serializable household id -> item dicts mapping"""
+        records = {household_id: [] for household_id in self.household_ids}
+        for household, item in zip(self.household.tolist(), self):
+            records[self.household_ids[household]].append(item.to_dict())
+        return records
+    
+    def expiring_mask(self, threshold=EXPIRY_THRESHOLD_DAYS):
+        """Boolean mask of the items expiring within threshold days"""
+        return self.days_until_expiry <= threshold
+    
+    def sum_by_household(self, values):
+        """Sum per-item values for every household"""
+        return np.bincount(self.household, weights=values, minlength=len(self.household_ids))
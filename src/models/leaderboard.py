@@ -1,32 +1,405 @@
 """
 Community leaderboard system
+
+Contributions are appended to a log file (one JSON line per contribution)
+and periodically compacted into the snapshot file, so recording a
+contribution writes a single line instead of rewriting the whole board.
+The board is safe to share between threads; with a flush interval, log
+writes from concurrent contributors are grouped into one write.
+
+Several processes (e.g. server workers) can share one board. Log writes
+and compactions are serialized by a lock file, sequence numbers are
+assigned under that lock, and every process reads the records the others
+appended before writing, compacting or answering a query.
+
+The snapshot is a JSON object {"last_seq": N, "users": [...]}, where N is
+the sequence number of the last logged contribution folded into it.
+Snapshots in the original format, a plain list of user entries, are
+still read (as last_seq 0) and are rewritten in the new format by the
+next compaction; the user entries themselves are unchanged.
 """
+import atexit
+import contextlib
 import json
+import math
 import os
+import tempfile
+import threading
+import time
 from datetime import datetime
+from sortedcontainers import SortedList
+
+try:
+    import fcntl
+except ImportError:
+    # No cross-process locking (e.g. on Windows); one process per board
+    fcntl = None
 
 class Leaderboard:
-    def __init__(self, data_file='data/leaderboard.json'):
+    def __init__(self, data_file='data/leaderboard.json', log_file=None, compact_every=1000,
+                 flush_interval_ms=0, max_pending=1000, fsync=False, refresh_interval_ms=0):
+        """
+        Args:
+            data_file (str): Snapshot file with every user's totals
+            log_file (str): Append-only contribution log. Defaults to the
+                snapshot path with a .log extension
+            compact_every (int): Number of logged contributions after which
+                the log is folded into the snapshot
+            flush_interval_ms (int): If positive, contributions are written to
+                the log by a background thread at most this many milliseconds
+                after they are made. 0 writes every contribution immediately
+            max_pending (int): Number of unwritten contributions that triggers
+                a flush before the interval ends
+            fsync (bool): Whether to fsync the log after each write
+            refresh_interval_ms (int): Minimum time between two reads
+                checking the shared files for other processes'
+                contributions. 0 checks on every read. Writes always catch
+                up first
+        """
         self.data_file = data_file
-        self.leaderboard = self._load_leaderboard()
+        self.log_file = log_file or os.path.splitext(data_file)[0] + '.log'
+        self.lock_file = os.path.splitext(self.log_file)[0] + '.lock'
+        self.compact_every = compact_every
+        # Username -> entry index plus the ranking of (-emissions, username)
+        # keys, which gives logarithmic updates, rank and range queries
+        self._entries = {}
+        self._ranking = SortedList()
+        self._seq = 0
+        self._version = 0
+        self._log_entries = 0
+        # How far this process has read the shared files: the log's inode
+        # and byte offset plus the identity of the snapshot it was built on
+        self._log_ino = None
+        self._log_offset = 0
+        self._snapshot_id = None
+        self._refresh_interval = refresh_interval_ms / 1000
+        self._next_refresh = 0
+        self._lock_fd = None
+        self._lock_pid = None
+        self.max_pending = max_pending
+        self.fsync = fsync
+        # _lock guards the in-memory board, _io_lock the log file. When both
+        # are needed _io_lock is always taken first, then the lock file,
+        # then _lock
+        self._lock = threading.RLock()
+        self._io_lock = threading.Lock()
+        self._pending = []
+        self._flush_interval = flush_interval_ms / 1000
+        self._flush_requested = threading.Event()
+        self._closed = False
+        self._flusher = None
+        self._load_leaderboard()
+        
+        if self._flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name='leaderboard-flusher', daemon=True)
+            self._flusher.start()
+            atexit.register(self.close)
+    
+    @property
+    def version(self):
+        """Counter bumped by every change to the board, for caching views of it"""
+        self._refresh()
+        return self._version
+    
+    @staticmethod
+    def _sort_key(entry):
+        return (-entry['total_emissions_avoided'], entry['username'])
+    
+    @property
+    def leaderboard(self):
+        """Copies of every entry sorted by emissions avoided (descending)"""
+        self._refresh()
+        with self._lock:
+            return [dict(entry) for entry in self._slice(0, len(self._ranking))]
+    
+    def _slice(self, start, stop):
+        """Entries ranked from start (inclusive) to stop (exclusive), 0-indexed"""
+        return [self._entries[username] for _, username in self._ranking.islice(start, stop)]
+    
+    @contextlib.contextmanager
+    def _file_lock(self, exclusive=True):
+        """Hold the lock that orders log and snapshot access between processes"""
+        if fcntl is None:
+            yield
+            return
+        if self._lock_fd is None or self._lock_pid != os.getpid():
+            # A descriptor inherited across fork would share the parent's lock
+            self._lock_fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+            self._lock_pid = os.getpid()
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+    
+    def _file_ids(self):
+        """Identity of the current log file and snapshot, and the log size"""
+        try:
+            log = os.stat(self.log_file)
+            log_ino, log_size = log.st_ino, log.st_size
+        except FileNotFoundError:
+            log_ino, log_size = None, 0
+        try:
+            snapshot = os.stat(self.data_file)
+            snapshot_id = (snapshot.st_ino, snapshot.st_mtime_ns, snapshot.st_size)
+        except FileNotFoundError:
+            snapshot_id = None
+        return log_ino, log_size, snapshot_id
     
     def _load_leaderboard(self):
-        """Load leaderboard data from file"""
+        """Load the snapshot and replay contributions logged after it"""
+        directory = os.path.dirname(self.data_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._io_lock, self._file_lock(exclusive=False):
+            self._reload()
+    
+    def _reload(self):
+        """
+        Rebuild the board from the snapshot and the whole log
+        
+        Contributions of this process that are not written yet are applied
+        again on top. Callers hold _io_lock and the lock file.
+        """
+        users = []
+        seq = 0
         if os.path.exists(self.data_file):
             try:
                 with open(self.data_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return []
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                snapshot = []
+            if isinstance(snapshot, list):
+                # Original format: a plain list of user entries, written
+                # before contributions had sequence numbers
+                users = snapshot
+            else:
+                users = snapshot.get('users', [])
+                seq = snapshot.get('last_seq', 0)
+        
+        data = b''
+        log_ino = None
+        if os.path.exists(self.log_file):
+            with open(self.log_file, 'rb') as f:
+                log_ino = os.fstat(f.fileno()).st_ino
+                data = f.read()
+        
+        with self._lock:
+            self._entries = {entry['username']: entry for entry in users}
+            self._ranking = SortedList(self._sort_key(entry) for entry in self._entries.values())
+            self._seq = seq
+            self._log_entries = 0
+            self._log_offset = self._replay(data)
+            self._log_ino = log_ino
+            self._snapshot_id = self._file_ids()[2]
+            for record in self._pending:
+                self._apply(record)
+            self._log_entries += len(self._pending)
+            self._version += 1
+    
+    def _replay(self, data):
+        """
+        Apply the complete log lines in data that are newer than the board
+        
+        Returns:
+            int: Number of bytes consumed; a torn last line is left unread
+        """
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            self._log_entries += 1
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn line from an interrupted write
+                continue
+            if record['seq'] <= self._seq:
+                # Already folded into the snapshot
+                continue
+            self._apply(record)
+            self._seq = record['seq']
+        return end
+    
+    def _sync(self):
+        """
+        Catch up with what other processes wrote since the last look
+        
+        Callers hold _io_lock and the lock file.
+        """
+        log_ino, log_size, snapshot_id = self._file_ids()
+        if log_ino != self._log_ino or snapshot_id != self._snapshot_id or log_size < self._log_offset:
+            # Another process compacted the log into a new snapshot
+            self._reload()
+            return
+        if log_size == self._log_offset:
+            return
+        with open(self.log_file, 'rb') as f:
+            f.seek(self._log_offset)
+            data = f.read()
+        with self._lock:
+            self._log_offset += self._replay(data)
+    
+    def _refresh(self):
+        """Pick up contributions other processes wrote, if there are any"""
+        if self._refresh_interval > 0:
+            # Checking costs two stat calls, which dominate a cached read
+            now = time.monotonic()
+            if now < self._next_refresh:
+                return
+            self._next_refresh = now + self._refresh_interval
+        log_ino, log_size, snapshot_id = self._file_ids()
+        if (log_ino, log_size, snapshot_id) == (self._log_ino, self._log_offset, self._snapshot_id):
+            return
+        with self._io_lock, self._file_lock(exclusive=False):
+            self._sync()
+    
+    def _apply(self, record, rank=True):
+        """
+        Apply one contribution record to the in-memory board
+        
+        Args:
+            record (dict): Logged contribution
+            rank (bool): Whether to update the ranking. Bulk updates
+                re-rank every touched entry once afterwards instead
+        """
+        username = record['username']
+        entry = self._entries.get(username)
+        if entry is not None:
+            # Take the entry out of its old position before its total changes
+            if rank:
+                self._ranking.remove(self._sort_key(entry))
+            entry['total_emissions_avoided'] += record['avoided_emissions']
+            entry['total_items_saved'] += record['items_saved']
+            entry['contributions'] += 1
+            # Records from other processes can arrive out of time order
+            entry['last_contribution'] = max(entry.get('last_contribution') or '', record['timestamp'])
         else:
-            # Create data directory if it doesn't exist
-            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-            return []
+            entry = {
+                'username': username,
+                'total_emissions_avoided': record['avoided_emissions'],
+                'total_items_saved': record['items_saved'],
+                'contributions': 1,
+                'last_contribution': record['timestamp']
+            }
+            self._entries[username] = entry
+        
+        if rank:
+            self._ranking.add(self._sort_key(entry))
+        self._version += 1
+    
+    def _write_log(self, records):
+        """
+        Append contribution records to the log in a single write
+        
+        Callers hold _io_lock and the lock file and have synced, so
+        anything past the read offset is a torn line from a crashed write.
+        """
+        data = ''.join(json.dumps(record) + '\n' for record in records).encode('utf-8')
+        with open(self.log_file, 'ab') as f:
+            if f.tell() > self._log_offset:
+                # Terminate a torn line so the next record starts cleanly
+                data = b'\n' + data
+            f.write(data)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+            self._log_offset = f.tell()
+            self._log_ino = os.fstat(f.fileno()).st_ino
+    
+    def _sequence_pending(self):
+        """Give pending records the next global sequence numbers and take them"""
+        with self._lock:
+            records = self._pending
+            self._pending = []
+            for record in records:
+                self._seq += 1
+                record['seq'] = self._seq
+            return records
+    
+    def flush(self):
+        """Write every pending contribution to the log"""
+        # Holding _io_lock from the swap to the write keeps the log in
+        # sequence order, while _lock is only held for the swap so
+        # contributors and readers are not blocked on disk I/O. Sequence
+        # numbers are assigned under the lock file, after catching up with
+        # other processes, so they are unique across processes
+        with self._io_lock:
+            if not self._pending:
+                return
+            with self._file_lock():
+                self._sync()
+                records = self._sequence_pending()
+                if records:
+                    self._write_log(records)
+    
+    def _flush_loop(self):
+        """Group-commit pending contributions until the board is closed"""
+        while not self._closed:
+            self._flush_requested.wait(self._flush_interval)
+            self._flush_requested.clear()
+            self.flush()
     
     def _save_leaderboard(self):
-        """Save leaderboard data to file"""
-        with open(self.data_file, 'w') as f:
-            json.dump(self.leaderboard, f, indent=2)
+        """Write a snapshot of every user's totals and start a new log"""
+        with self._io_lock, self._file_lock():
+            # Other processes' records are folded in too, so starting a new
+            # log cannot lose them
+            self._sync()
+            with self._lock:
+                self._sequence_pending()
+                snapshot = {'last_seq': self._seq, 'users': self._slice(0, len(self._ranking))}
+                data = json.dumps(snapshot)
+            
+            directory = os.path.dirname(self.data_file) or '.'
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(data)
+                    if self.fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+                os.replace(tmp_path, self.data_file)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            
+            # Pending records are part of the snapshot now. Records up to
+            # last_seq are skipped on replay, so a crash before the log is
+            # replaced cannot count a contribution twice. Replacing the log
+            # rather than truncating it gives it a new inode, which tells
+            # other processes to reload
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.log_file) or '.', suffix='.tmp')
+            os.close(fd)
+            os.replace(tmp_path, self.log_file)
+            log_ino, _, snapshot_id = self._file_ids()
+            with self._lock:
+                self._log_ino = log_ino
+                self._log_offset = 0
+                self._snapshot_id = snapshot_id
+                # Contributions made while the snapshot was written
+                self._log_entries = len(self._pending)
+    
+    def compact(self):
+        """Fold the contribution log into the snapshot file"""
+        self._save_leaderboard()
+    
+    def close(self):
+        """Flush pending contributions, stop the flusher and close the log"""
+        if self._flusher is not None and not self._closed:
+            self._closed = True
+            self._flush_requested.set()
+            self._flusher.join()
+            atexit.unregister(self.close)
+        # Contributions made after closing are written synchronously
+        self._flusher = None
+        self._closed = True
+        self.flush()
+        with self._io_lock:
+            if self._lock_fd is not None and self._lock_pid == os.getpid():
+                os.close(self._lock_fd)
+            self._lock_fd = None
     
     def add_user_contribution(self, username, avoided_emissions, items_saved):
         """
@@ -35,36 +408,99 @@ class Leaderboard:
         Args:
             username (str): User's name
             avoided_emissions (float): Amount of emissions avoided in kg CO2
-            items_saved (int): Number of items saved from waste
-        """
-        # Check if user already exists
-        user_found = False
-        for entry in self.leaderboard:
-            if entry['username'] == username:
-                # Update existing user's stats
-                entry['total_emissions_avoided'] += avoided_emissions
-                entry['total_items_saved'] += items_saved
-                entry['contributions'] += 1
-                entry['last_contribution'] = datetime.now().isoformat()
-                user_found = True
-                break
-        
-        # Add new user if not found
-        if not user_found:
-            new_entry = {
+            items_saved (float): Number of items saved from waste
+        """
+        with self._lock:
+            # The sequence number is assigned when the record is written
+            record = {
                 'username': username,
-                'total_emissions_avoided': avoided_emissions,
-                'total_items_saved': items_saved,
-                'contributions': 1,
-                'last_contribution': datetime.now().isoformat()
+                'avoided_emissions': avoided_emissions,
+                'items_saved': items_saved,
+                'timestamp': datetime.now().isoformat()
             }
-            self.leaderboard.append(new_entry)
+            self._apply(record)
+            self._pending.append(record)
+            self._log_entries += 1
+            compact = self._log_entries >= self.compact_every
+            if self._flusher is not None and len(self._pending) >= self.max_pending:
+                self._flush_requested.set()
         
-        # Sort by emissions avoided (descending)
-        self.leaderboard.sort(key=lambda x: x['total_emissions_avoided'], reverse=True)
+        if compact:
+            self._save_leaderboard()
+        elif self._flusher is None:
+            self.flush()
+    
+    def add_user_contributions(self, contributions):
+        """
+        Add many contributions at once
         
-        # Save updated leaderboard
-        self._save_leaderboard()
+        Every valid contribution is applied under a single lock hold, the
+        touched users are re-ranked once and the log is written (or
+        compacted) once for the whole batch.
+        
+        Args:
+            contributions (iterable): (username, avoided_emissions,
+                items_saved) tuples
+        
+        Returns:
+            dict: 'accepted' count and 'errors', a list of
+                {'index', 'error'} for every rejected contribution
+        """
+        errors = []
+        valid = []
+        for index, contribution in enumerate(contributions):
+            try:
+                valid.append(self._validate(contribution))
+            except (TypeError, ValueError) as e:
+                errors.append({'index': index, 'error': str(e)})
+        
+        with self._lock:
+            timestamp = datetime.now().isoformat()
+            touched = {username for username, _, _ in valid}
+            for username in touched:
+                entry = self._entries.get(username)
+                if entry is not None:
+                    self._ranking.remove(self._sort_key(entry))
+            
+            records = []
+            for username, avoided_emissions, items_saved in valid:
+                record = {
+                    'username': username,
+                    'avoided_emissions': avoided_emissions,
+                    'items_saved': items_saved,
+                    'timestamp': timestamp
+                }
+                self._apply(record, rank=False)
+                records.append(record)
+            self._ranking.update(self._sort_key(self._entries[username]) for username in touched)
+            
+            self._pending.extend(records)
+            self._log_entries += len(records)
+            compact = self._log_entries >= self.compact_every
+        
+        if compact:
+            self._save_leaderboard()
+        elif records:
+            self.flush()
+        return {'accepted': len(records), 'errors': errors}
+    
+    @staticmethod
+    def _validate(contribution):
+        """Check one bulk contribution and return it as a tuple"""
+        try:
+            username, avoided_emissions, items_saved = contribution
+        except (TypeError, ValueError):
+            raise ValueError("expected (username, avoided_emissions, items_saved)")
+        if not isinstance(username, str) or not username:
+            raise ValueError("username must be a non-empty string")
+        # Both can be fractional: quantities of loose food (e.g. 1.5 kg of
+        # rice) carry through to the emission results
+        for name, value in (('avoided_emissions', avoided_emissions), ('items_saved', items_saved)):
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                raise ValueError(f"{name} must be a finite number")
+        if avoided_emissions < 0 or items_saved < 0:
+            raise ValueError("contributions cannot be negative")
+        return username, avoided_emissions, items_saved
     
     def get_top_users(self, limit=10):
         """
@@ -72,11 +508,13 @@ class Leaderboard:
         
         Args:
             limit (int): Number of top users to return
-            
+        
         Returns:
             list: Top users sorted by emissions avoided
         """
-        return self.leaderboard[:limit]
+        self._refresh()
+        with self._lock:
+            return [dict(entry) for entry in self._slice(0, limit)]
     
     def get_user_rank(self, username):
         """
@@ -84,14 +522,44 @@ class Leaderboard:
         
         Args:
             username (str): User's name
-            
+        
         Returns:
             int: User's rank (1-indexed) or None if user not found
         """
-        for i, entry in enumerate(self.leaderboard):
-            if entry['username'] == username:
-                return i + 1
-        return None
+        self._refresh()
+        with self._lock:
+            return self._rank(username)
+    
+    def _rank(self, username):
+        entry = self._entries.get(username)
+        if entry is None:
+            return None
+        return self._ranking.index(self._sort_key(entry)) + 1
+    
+    def get_users_around(self, username, window=2):
+        """
+        Get the users ranked just above and below a specific user
+        
+        Args:
+            username (str): User's name
+            window (int): Number of users to include on each side
+        
+        Returns:
+            list: Entries with an added 'rank' key, or None if user not found
+        """
+        self._refresh()
+        with self._lock:
+            rank = self._rank(username)
+            if rank is None:
+                return None
+            start = max(rank - 1 - window, 0)
+            entries = self._slice(start, rank + window)
+            return [dict(entry, rank=start + i + 1) for i, entry in enumerate(entries)]
+    
+    def __len__(self):
+        self._refresh()
+        with self._lock:
+            return len(self._ranking)
 
 # Example usage
 if __name__ == "__main__":
@@ -106,4 +574,4 @@ if __name__ == "__main__":
     print("Top contributors:")
     top_users = leaderboard.get_top_users(5)
     for i, user in enumerate(top_users, 1):
-        print(f"{i}. {user['username']}: {user['total_emissions_avoided']:.1f} kg CO2 avoided")
\ No newline at end of file
+        print(f"{i}. {user['username']}: {user['total_emissions_avoided']:.1f} kg CO2 avoided")
@@ -0,0 +1,83 @@
+"""
+Meal planner that combines recipes to use up expiring food
+"""
+import heapq
+from models.inventory import Inventory, ExpiringStock
+
+class MealPlanner:
+    def __init__(self, recipe_recommender, emission_calculator, max_candidates=200):
+        """
+        Args:
+            recipe_recommender (RecipeRecommender): Source of recipes
+            emission_calculator (EmissionCalculator): Source of carbon footprints
+            max_candidates (int): Number of best-scored recipes the planner
+                considers, which bounds its runtime on large catalogs
+        """
+        self.recipe_recommender = recipe_recommender
+        self.emission_calculator = emission_calculator
+        self.max_candidates = max_candidates
+    
+    def plan_meals(self, food_items, days=3, meals_per_day=1):
+        """
+        Plan recipes over the next days to maximize avoided emissions
+        
+        Slots are filled day by day. Each slot gets the recipe that saves the
+        most emissions from the expiring units still good and unused that
+        day. Using a unit only lowers what other recipes can still save, so
+        gains are re-evaluated lazily: a recipe is only rescored when it
+        reaches the top of the heap.
+        
+        Args:
+            food_items (list or Inventory): Detected food items
+            days (int): Number of days to plan, starting today
+            meals_per_day (int): Number of recipes per day
+            
+        Returns:
+            dict: 'days' with the recipes planned for each day,
+            'recipes_used' with every planned recipe tagged with its 'day'
+            and 'emission_results' for the plan
+        """
+        inventory = Inventory.from_items(food_items)
+        scores = self.recipe_recommender.score_recipes(inventory)
+        candidates = heapq.nlargest(self.max_candidates, scores, key=scores.get)
+        ingredients = {key: set(self.recipe_recommender.recipe_ingredients[key]) for key in candidates}
+        
+        stock = ExpiringStock(inventory)
+        
+        def gain(recipe_key, day):
+            return sum(self.emission_calculator.get_food_footprint(name)
+                       for name in ingredients[recipe_key] if stock.available(name, day))
+        
+        plan = []
+        recipes_used = []
+        for day in range(days):
+            planned = []
+            heap = [(-gain(key, day), rank, key) for rank, key in enumerate(candidates)]
+            heap = [entry for entry in heap if entry[0] < 0]
+            heapq.heapify(heap)
+            
+            while heap and len(planned) < meals_per_day:
+                _, rank, key = heapq.heappop(heap)
+                current = gain(key, day)
+                if current <= 0:
+                    continue
+                if heap and current < -heap[0][0]:
+                    # Stale bound: put it back with its current gain
+                    heapq.heappush(heap, (-current, rank, key))
+                    continue
+                
+                for name in ingredients[key]:
+                    stock.consume(name, day)
+                recipe = dict(self.recipe_recommender.recipe_database[key], day=day)
+                planned.append(recipe)
+                recipes_used.append(recipe)
+                # The same recipe may be cooked again if it still saves food
+                heapq.heappush(heap, (-gain(key, day), rank, key))
+            
+            plan.append({'day': day, 'recipes': planned})
+        
+        return {
+            'days': plan,
+            'recipes_used': recipes_used,
+            'emission_results': self.emission_calculator.calculate_avoided_emissions(inventory, recipes_used=recipes_used)
+        }
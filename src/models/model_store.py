@@ -0,0 +1,79 @@
+"""
+Persistent store of fitted Prophet models keyed by training-data fingerprint
+"""
+import hashlib
+import json
+from models.disk_cache import DiskLRUCache
+
+# Bump when the serialized model format or fingerprint scheme changes
+STORE_FORMAT_VERSION = 1
+
+class ModelStore:
+    def __init__(self, directory='data/models', max_models=16):
+        self.cache = DiskLRUCache(directory, max_entries=max_models, suffix='.json')
+    
+    @staticmethod
+    def fingerprint(df, settings):
+        """
+        Compute the store key of a training frame and model settings
+        
+        Args:
+            df (DataFrame): Training data with 'ds' and 'y' columns
+            settings (dict): Model settings such as seasonality flags
+            
+        Returns:
+            str: Hex digest identifying the model that would be fitted
+        """
+        import pandas as pd
+        
+        digest = hashlib.sha256()
+        digest.update(str(STORE_FORMAT_VERSION).encode())
+        digest.update(json.dumps(settings, sort_keys=True).encode())
+        digest.update(pd.util.hash_pandas_object(df[['ds', 'y']], index=False).values.tobytes())
+        return digest.hexdigest()
+    
+    def load(self, key):
+        """
+        Load a fitted model from the store
+        
+        Args:
+            key (str): Fingerprint returned by fingerprint()
+            
+        Returns:
+            Prophet: Fitted model or None if it is not stored
+        """
+        from prophet.serialize import model_from_json
+        
+        data = self.cache.get(key)
+        if data is None:
+            return None
+        try:
+            return model_from_json(data.decode('utf-8'))
+        except Exception:
+            # A corrupt or incompatible entry is treated as a miss
+            self.cache.invalidate(key)
+            return None
+    
+    def save(self, key, model):
+        """
+        Serialize a fitted model into the store
+        
+        Args:
+            key (str): Fingerprint returned by fingerprint()
+            model (Prophet): Fitted model
+        """
+        from prophet.serialize import model_to_json
+        
+        self.cache.put(key, model_to_json(model).encode('utf-8'))
+    
+    def invalidate(self, key=None):
+        """
+        Remove one stored model, or all of them when no key is given
+        
+        Args:
+            key (str): Fingerprint of the model to remove
+        """
+        self.cache.invalidate(key)
+    
+    def __contains__(self, key):
+        return key in self.cache
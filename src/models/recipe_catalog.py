@@ -0,0 +1,99 @@
+"""
+Disk-backed recipe catalog with memory-mapped instruction text
+"""
+import csv
+import mmap
+import os
+from collections.abc import Mapping
+
+RECIPE_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'recipes.csv')
+
+INDEX_FIELDS = ['id', 'name', 'ingredients', 'preparation_time', 'instructions_offset', 'instructions_length']
+
+def _instructions_path(index_path):
+    return os.path.splitext(index_path)[0] + '_instructions.txt'
+
+class RecipeCatalog(Mapping):
+    """
+    Read-only mapping of recipe id -> recipe
+    
+    Ids, names, ingredient lists and preparation times are held in memory for
+    matching. Instruction text stays in a separate file that is memory-mapped
+    and decoded only when a recipe is actually looked up, so processes share
+    it through the page cache instead of each holding a copy.
+    """
+    
+    def __init__(self, index_path=RECIPE_CATALOG_PATH):
+        self.index_path = index_path
+        self._recipes = {}
+        with open(index_path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                self._recipes[row['id']] = (
+                    row['name'],
+                    row['ingredients'].split(';') if row['ingredients'] else [],
+                    int(row['preparation_time']),
+                    int(row['instructions_offset']),
+                    int(row['instructions_length'])
+                )
+        
+        self._file = open(_instructions_path(index_path), 'rb')
+        if os.fstat(self._file.fileno()).st_size > 0:
+            self._instructions = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # mmap cannot map an empty file
+            self._instructions = b''
+    
+    @staticmethod
+    def write(recipes, index_path=RECIPE_CATALOG_PATH):
+        """
+        Write recipes to the on-disk catalog format
+        
+        Args:
+            recipes (dict): Recipe id -> recipe with 'name', 'ingredients',
+                'instructions' and 'preparation_time'
+            index_path (str): Path of the index CSV. Instructions are written
+                next to it
+        """
+        offset = 0
+        with open(index_path, 'w', newline='', encoding='utf-8') as index_file, \
+                open(_instructions_path(index_path), 'wb') as instructions_file:
+            writer = csv.DictWriter(index_file, fieldnames=INDEX_FIELDS, lineterminator='\n')
+            writer.writeheader()
+            for recipe_id, recipe in recipes.items():
+                instructions = recipe['instructions'].encode('utf-8')
+                instructions_file.write(instructions)
+                writer.writerow({
+                    'id': recipe_id,
+                    'name': recipe['name'],
+                    'ingredients': ';'.join(recipe['ingredients']),
+                    'preparation_time': recipe['preparation_time'],
+                    'instructions_offset': offset,
+                    'instructions_length': len(instructions)
+                })
+                offset += len(instructions)
+    
+    def __getitem__(self, recipe_id):
+        name, ingredients, preparation_time, offset, length = self._recipes[recipe_id]
+        return {
+            'name': name,
+            'ingredients': list(ingredients),
+            'instructions': self._instructions[offset:offset + length].decode('utf-8'),
+            'preparation_time': preparation_time
+        }
+    
+    def __iter__(self):
+        return iter(self._recipes)
+    
+    def __len__(self):
+        return len(self._recipes)
+    
+    def ingredient_lists(self):
+        """Iterate over (recipe id, ingredients) without reading any instructions"""
+        for recipe_id, record in self._recipes.items():
+            yield recipe_id, record[1]
+    
+    def close(self):
+        """Release the instruction file mapping"""
+        if isinstance(self._instructions, mmap.mmap):
+            self._instructions.close()
+        self._file.close()
@@ -1,64 +1,114 @@
 """
 Recipe recommendation system for expiring food items
 """
+import heapq
 import random
+from collections import Counter
+from models.food_catalog import get_food_catalog
+from models.inventory import Inventory
+from models.recipe_catalog import RecipeCatalog
 
 class RecipeRecommender:
-    def __init__(self):
-        self.recipe_database = self._load_recipe_database()
+    def __init__(self, recipe_database=None, food_catalog=None):
+        """
+        Args:
+            recipe_database (dict or RecipeCatalog): Recipe key -> recipe.
+                If None, the catalog in data/recipes.csv is loaded
+            food_catalog (FoodCatalog): Source of food ids. Defaults to the
+                shared catalog of data/food_database.csv
+        """
+        self.food_catalog = food_catalog or get_food_catalog()
+        # Ingredients that are not in the food catalog get ids after its own
+        self._food_ids = dict(self.food_catalog.ids)
+        if recipe_database is None:
+            recipe_database = self._load_recipe_database()
+        self.recipe_database = recipe_database
+        self._build_ingredient_index()
     
     def _load_recipe_database(self):
         """Load recipe database with ingredients and instructions"""
-        # In a real implementation, this would be loaded from a database or file
-        recipes = {
-            'scrambled_eggs': {
-                'name': 'Scrambled Eggs',
-                'ingredients': ['egg', 'milk'],
-                'instructions': '1. Crack eggs into a bowl\n2. Add milk and whisk\n3. Cook in a pan over medium heat\n4. Stir continuously until set',
-                'preparation_time': 10
-            },
-            'banana_bread': {
-                'name': 'Banana Bread',
-                'ingredients': ['banana', 'bread', 'egg'],
-                'instructions': '1. Mash bananas\n2. Mix with eggs\n3. Add bread cubes\n4. Bake at 180°C for 20 minutes',
-                'preparation_time': 30
-            },
-            'tomato_salad': {
-                'name': 'Tomato Salad',
-                'ingredients': ['tomato', 'lettuce'],
-                'instructions': '1. Chop tomatoes and lettuce\n2. Mix together\n3. Add dressing to taste',
-                'preparation_time': 10
-            },
-            'fruit_smoothie': {
-                'name': 'Fruit Smoothie',
-                'ingredients': ['banana', 'milk'],
-                'instructions': '1. Blend bananas with milk\n2. Serve cold',
-                'preparation_time': 5
-            }
-        }
-        return recipes
+        # Instructions stay on disk until a recipe is returned
+        return RecipeCatalog()
+    
+    def _food_id(self, name):
+        """Get the food id of an ingredient, assigning one to unknown ingredients"""
+        food_id = self._food_ids.get(name)
+        if food_id is None:
+            food_id = self.food_catalog.unknown_id + 1 + len(self._food_ids) - len(self.food_catalog)
+            self._food_ids[name] = food_id
+        return food_id
     
-    def recommend_recipes(self, food_items):
+    def _build_ingredient_index(self):
+        """Build the inverted index from ingredient food id to the recipes using it"""
+        self.ingredient_index = {}
+        self.recipe_order = {}
+        self.recipe_ingredients = {}
+        if isinstance(self.recipe_database, RecipeCatalog):
+            ingredient_lists = self.recipe_database.ingredient_lists()
+        else:
+            ingredient_lists = ((recipe_key, recipe['ingredients']) for recipe_key, recipe in self.recipe_database.items())
+        
+        for position, (recipe_key, ingredients) in enumerate(ingredient_lists):
+            self.recipe_order[recipe_key] = position
+            self.recipe_ingredients[recipe_key] = ingredients
+            for food_id in {self._food_id(ingredient) for ingredient in ingredients}:
+                self.ingredient_index.setdefault(food_id, []).append(recipe_key)
+    
+    def recommend_recipes(self, food_items, top_k=None):
         """
         Recommend recipes based on expiring food items
         
+        Only recipes listed in the ingredient index under an expiring item
+        are considered. Each one is scored by the expiring items it uses,
+        weighted by quantity and by how soon they expire, and ties keep the
+        order of the recipe database. With top_k, a heap selects the best
+        recipes without sorting every candidate.
+        
+        Args:
+            food_items (list or Inventory): Detected food items
+            top_k (int): Maximum number of recipes to return. None returns
+                every matching recipe
+            
+        Returns:
+            list: Recommended recipes, best first
+        """
+        scores = self.score_recipes(food_items)
+        rank_key = lambda recipe_key: (scores[recipe_key], -self.recipe_order[recipe_key])
+        
+        if top_k is None:
+            ranked = sorted(scores, key=rank_key, reverse=True)
+        else:
+            ranked = heapq.nlargest(top_k, scores, key=rank_key)
+        return [self.recipe_database[recipe_key] for recipe_key in ranked]
+    
+    def score_recipes(self, food_items):
+        """
+        Score every recipe that uses at least one expiring item
+        
+        An expiring item contributes its quantity times an urgency between 1
+        (expires today or already expired) and 1 / (threshold + 1) (expires
+        on the last day of the threshold).
+        
         Args:
-            food_items (list): List of detected food items
+            food_items (list or Inventory): Detected food items
             
         Returns:
-            list: Recommended recipes
+            dict: Recipe key -> score
         """
-        # Get expiring items (within 3 days)
-        expiring_items = [item['name'] for item in food_items if item['days_until_expiry'] <= 3]
+        inventory = Inventory.from_items(food_items)
+        horizon = inventory.expiry_threshold + 1
         
-        # Find recipes that use these items
-        recommended_recipes = []
-        for recipe_key, recipe in self.recipe_database.items():
-            # Check if recipe uses any expiring items
-            if any(ingredient in expiring_items for ingredient in recipe['ingredients']):
-                recommended_recipes.append(recipe)
+        weights = Counter()
+        for item in inventory.expiring_items:
+            urgency = (horizon - max(item['days_until_expiry'], 0)) / horizon
+            weights[item['name']] += item['quantity'] * urgency
         
-        return recommended_recipes
+        scores = Counter()
+        for name, weight in weights.items():
+            food_id = self._food_ids.get(name)
+            for recipe_key in self.ingredient_index.get(food_id, ()):
+                scores[recipe_key] += weight
+        return scores
     
     def get_recipe_details(self, recipe_name):
         """Get detailed information about a recipe"""
@@ -2,19 +2,46 @@
 Prophet model for food waste prediction
 """
 import pandas as pd
-from prophet import Prophet
 import numpy as np
 import os
+from concurrent.futures import ProcessPoolExecutor
+from models.inventory import Inventory
 
 class FoodWastePredictor:
-    def __init__(self):
-        self.model = Prophet(
-            daily_seasonality=True,
-            weekly_seasonality=True,
-            yearly_seasonality=True
-        )
+    def __init__(self, daily_seasonality=True, weekly_seasonality=True, yearly_seasonality=True, model_store=None,
+                 forecast_horizon=90):
+        self.seasonality = {
+            'daily_seasonality': daily_seasonality,
+            'weekly_seasonality': weekly_seasonality,
+            'yearly_seasonality': yearly_seasonality
+        }
+        self._model = None
         self.is_fitted = False
         self.training_data = None
+        self.model_store = model_store
+        self.model_key = None
+        # Incremented whenever a new fitted model is installed
+        self.model_version = 0
+        self.forecast_horizon = forecast_horizon
+        self._forecast_cache = {}
+    
+    @property
+    def model(self):
+        # Prophet takes about a second to import, so it is only loaded once
+        # a model is actually needed
+        if self._model is None:
+            self._model = self._build_model()
+        return self._model
+    
+    @model.setter
+    def model(self, model):
+        self._model = model
+    
+    def _build_model(self):
+        """Create an unfitted Prophet model with this predictor's settings"""
+        from prophet import Prophet
+        
+        return Prophet(**self.seasonality)
     
     def prepare_data(self, csv_path='data/food_waste_sample.csv'):
         """
@@ -48,6 +75,9 @@ class FoodWastePredictor:
         """
         Train the Prophet model
         
+        When a model store is configured, a model already fitted on the same
+        data and settings is loaded from the store instead of being refitted.
+        
         Args:
             df (DataFrame): Training data. If None, uses data from prepare_data()
         """
@@ -55,16 +85,80 @@ class FoodWastePredictor:
             if self.training_data is None:
                 raise ValueError("No training data available. Call prepare_data() first.")
             df = self.training_data
-            
-        self.model.fit(df)
+        
+        key = None
+        if self.model_store is not None:
+            key = self.model_store.fingerprint(df, self.seasonality)
+            model = self.model_store.load(key)
+            if model is not None:
+                self._set_model(model, key)
+                return
+        
+        # A Prophet instance can only be fitted once
+        model = self._build_model() if self.is_fitted else self.model
+        model.fit(df)
+        self._set_model(model, key, save=True)
+    
+    def update(self, new_rows):
+        """
+        Retrain the model after new observations arrive
+        
+        The new rows are appended to the model's history and a fresh model is
+        fitted with the previous model's parameters as the optimizer's
+        starting point, which converges in far fewer iterations than a cold
+        fit when only a few days were added. If the changepoint layout of the
+        grown history differs from the previous fit, the model is fitted cold.
+        
+        Args:
+            new_rows (DataFrame): New observations with 'ds' and 'y' columns.
+                Rows for dates already in the history replace the old values
+        """
+        if not self.is_fitted:
+            raise ValueError("Model must be trained first")
+        
+        new_rows = new_rows[['ds', 'y']].copy()
+        new_rows['ds'] = pd.to_datetime(new_rows['ds'])
+        history = pd.concat([self.model.history[['ds', 'y']], new_rows], ignore_index=True)
+        history = history.drop_duplicates(subset='ds', keep='last').sort_values('ds').reset_index(drop=True)
+        self.training_data = history
+        
+        key = None
+        if self.model_store is not None:
+            key = self.model_store.fingerprint(history, self.seasonality)
+            model = self.model_store.load(key)
+            if model is not None:
+                self._set_model(model, key)
+                return
+        
+        model = self._build_model()
+        init = _warm_start_params(self.model)
+        if len(init['delta']) != _expected_changepoints(model, len(history)):
+            init = None
+        model.fit(history, init=init)
+        self._set_model(model, key, save=True)
+    
+    def _set_model(self, model, key, save=False):
+        """Install a fitted model and drop forecasts made by the previous one"""
+        self.model = model
+        self.model_key = key
         self.is_fitted = True
+        self.model_version += 1
+        self._forecast_cache.clear()
+        if save and self.model_store is not None:
+            self.model_store.save(key, model)
     
-    def predict_waste(self, periods=30):
+    def predict_waste(self, periods=30, include_history=True):
         """
         Predict food waste for future periods
         
+        Forecasts are cached per model version. The first call predicts at
+        least ``forecast_horizon`` days and later calls with a shorter or equal
+        horizon are served by slicing the cached frame.
+        
         Args:
             periods (int): Number of days to predict
+            include_history (bool): Whether to include fitted values for the
+                training history. Set to False to predict only future days
             
         Returns:
             DataFrame: Predictions
@@ -72,25 +166,121 @@ class FoodWastePredictor:
         if not self.is_fitted:
             raise ValueError("Model must be trained first")
         
+        history_size = len(self.model.history_dates)
+        if include_history:
+            forecast = self._cached_forecast(True, periods)
+            if forecast is not None:
+                return forecast.iloc[:history_size + periods].copy()
+        else:
+            forecast = self._cached_forecast(False, periods)
+            if forecast is not None:
+                return forecast.iloc[:periods].copy()
+            # A cached forecast with history also holds the future days
+            forecast = self._cached_forecast(True, periods)
+            if forecast is not None:
+                return forecast.iloc[history_size:history_size + periods].reset_index(drop=True)
+        
         # Create future dataframe
-        future = self.model.make_future_dataframe(periods=periods)
-        forecast = self.model.predict(future)
+        horizon = max(periods, self.forecast_horizon)
+        future = self.model.make_future_dataframe(periods=horizon, include_history=include_history)
+        forecast = self.model.predict(future)[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+        self._forecast_cache[include_history] = (horizon, forecast)
         
-        return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+        if include_history:
+            return forecast.iloc[:history_size + periods].copy()
+        return forecast.iloc[:periods].copy()
+    
+    def _cached_forecast(self, include_history, periods):
+        """Return the cached forecast if it covers the requested horizon"""
+        cached = self._forecast_cache.get(include_history)
+        if cached is not None and cached[0] >= periods:
+            return cached[1]
+        return None
+    
+    def precompute_horizon(self, periods):
+        """
+        Predict and cache the forecast up to a maximum horizon
+        
+        Args:
+            periods (int): Longest horizon that will be requested
+        """
+        self.forecast_horizon = max(self.forecast_horizon, periods)
+        self.predict_waste(periods)
+    
+    def predict_waste_batch(self, df, periods=30, max_workers=None, shard_size=8, id_column='household_id'):
+        """
+        Fit one model per household and predict food waste for all of them
+        
+        Households are grouped into shards of ``shard_size`` series and the
+        shards are fitted in parallel on a process pool. Every series gets
+        its own model using this predictor's seasonality settings; a series
+        that fails to fit is reported in the failures instead of aborting
+        the whole batch.
+        
+        Args:
+            df (DataFrame): Long-format data with id_column, 'ds' and 'y' columns
+            periods (int): Number of days to predict
+            max_workers (int): Number of worker processes. None uses every CPU,
+                1 fits all series in the current process
+            shard_size (int): Number of series sent to a worker per task
+            id_column (str): Name of the household identifier column
+            
+        Returns:
+            tuple: (DataFrame of predictions with id_column, dict of
+            household id -> error message for series that failed)
+        """
+        missing = {id_column, 'ds', 'y'} - set(df.columns)
+        if missing:
+            raise ValueError(f"Batch data is missing columns: {sorted(missing)}")
+        if shard_size < 1:
+            raise ValueError("shard_size must be at least 1")
+        
+        df = df[[id_column, 'ds', 'y']].copy()
+        df['ds'] = pd.to_datetime(df['ds'])
+        series = [(household_id, group[['ds', 'y']]) for household_id, group in df.groupby(id_column, sort=False)]
+        shards = [series[i:i + shard_size] for i in range(0, len(series), shard_size)]
+        
+        results = []
+        if max_workers == 1 or len(shards) <= 1:
+            for shard in shards:
+                results.append(_forecast_shard(shard, periods, self.seasonality, id_column))
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(_forecast_shard, shard, periods, self.seasonality, id_column) for shard in shards]
+                for shard, future in zip(shards, futures):
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        # The worker itself died, so every series in the shard is lost
+                        results.append(([], {household_id: str(e) for household_id, _ in shard}))
+        
+        forecasts = []
+        failures = {}
+        for shard_forecasts, shard_failures in results:
+            forecasts.extend(shard_forecasts)
+            failures.update(shard_failures)
+        
+        if forecasts:
+            forecast = pd.concat(forecasts, ignore_index=True)
+        else:
+            forecast = pd.DataFrame(columns=[id_column, 'ds', 'yhat', 'yhat_lower', 'yhat_upper'])
+        return forecast, failures
     
     def calculate_waste_from_items(self, food_items):
         """
         Calculate potential waste based on detected food items
         
         Args:
-            food_items (list): List of detected food items
+            food_items (list or Inventory): Detected food items
             
         Returns:
             dict: Waste prediction information
         """
+        inventory = Inventory.from_items(food_items)
+        
         # Calculate total potential waste
-        total_items = sum([item['quantity'] for item in food_items])
-        expiring_soon = sum([item['quantity'] for item in food_items if item['days_until_expiry'] <= 3])
+        total_items = inventory.total_quantity
+        expiring_soon = inventory.expiring_quantity
         
         return {
             'total_items': total_items,
@@ -98,6 +288,44 @@ class FoodWastePredictor:
             'estimated_waste_percentage': (expiring_soon / total_items) * 100 if total_items > 0 else 0
         }
 
+def _warm_start_params(model):
+    """Extract fitted parameters of a Prophet model as a Stan initialization"""
+    params = {}
+    for name in ['k', 'm', 'sigma_obs']:
+        if model.mcmc_samples == 0:
+            params[name] = model.params[name][0][0]
+        else:
+            params[name] = np.mean(model.params[name])
+    for name in ['delta', 'beta']:
+        if model.mcmc_samples == 0:
+            params[name] = model.params[name][0]
+        else:
+            params[name] = np.mean(model.params[name], axis=0)
+    return params
+
+def _expected_changepoints(model, history_size):
+    """Number of changepoints Prophet will use for a history of the given size"""
+    # Mirrors Prophet.set_changepoints, which shrinks the count for short histories
+    usable = int(np.floor(history_size * model.changepoint_range))
+    count = model.n_changepoints if model.n_changepoints + 1 <= usable else usable - 1
+    # Without changepoints Prophet still fits a single dummy slope change
+    return max(count, 1)
+
+def _forecast_shard(shard, periods, seasonality, id_column):
+    """Fit and predict every series of a shard (runs inside a worker process)"""
+    forecasts = []
+    failures = {}
+    for household_id, series in shard:
+        try:
+            predictor = FoodWastePredictor(forecast_horizon=0, **seasonality)
+            predictor.train_model(series)
+            forecast = predictor.predict_waste(periods)
+            forecast.insert(0, id_column, household_id)
+            forecasts.append(forecast)
+        except Exception as e:
+            failures[household_id] = str(e)
+    return forecasts, failures
+
 # Example usage
 if __name__ == "__main__":
     predictor = FoodWastePredictor()
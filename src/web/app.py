@@ -3,15 +3,112 @@ Flask web application for FoodPrint Forecast
 """
 import sys
 import os
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+import io
+import atexit
+import hashlib
+import queue
+import threading
+from flask import Flask, Request, render_template, request, jsonify, redirect, url_for
+from flask.json.provider import DefaultJSONProvider
 
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from src.models.coordinator import FoodPrintForecast
+from src.web.jobs import JobQueue
+from src.web.uploads import UploadSpill
+
+class FoodPrintJSONProvider(DefaultJSONProvider):
+    """JSON provider that serializes compact inventory records as dicts"""
+    
+    @staticmethod
+    def default(o):
+        if hasattr(o, 'to_dict'):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
+class InMemoryUploadRequest(Request):
+    """Request that keeps uploaded files in memory instead of temp files"""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # MAX_CONTENT_LENGTH bounds the memory an upload can take
+        return io.BytesIO()
 
 app = Flask(__name__)
-system = FoodPrintForecast()
+app.json = FoodPrintJSONProvider(app)
+app.request_class = InMemoryUploadRequest
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('FOODPRINT_MAX_UPLOAD_MB', 16)) * 1024 * 1024
+# Request threads share one system, so leaderboard writes from concurrent
+# contributions are group-committed. It is closed when the process exits
+system = FoodPrintForecast(leaderboard_flush_ms=50)
+atexit.register(system.close)
+
+# Uploads are analyzed by a small worker pool and polled at /jobs/<id>, so
+# slow inference does not hold a request thread. When the queue is full,
+# uploads are refused with 503 instead of piling up
+app.config['ASYNC_UPLOADS'] = os.environ.get('FOODPRINT_ASYNC_UPLOADS', '1') != '0'
+# FOODPRINT_JOB_DIR shares job states between server worker processes,
+# since a job may be polled on a different process than the one running it
+jobs = JobQueue(
+    workers=int(os.environ.get('FOODPRINT_UPLOAD_WORKERS', 2)),
+    max_pending=int(os.environ.get('FOODPRINT_UPLOAD_QUEUE', 32)),
+    state_dir=os.environ.get('FOODPRINT_JOB_DIR'),
+    dumps=app.json.dumps
+)
+
+# Uploads are decoded from memory. Set FOODPRINT_UPLOAD_SPILL_DIR to also
+# keep copies on disk, bounded in total size and age
+spill = None
+if os.environ.get('FOODPRINT_UPLOAD_SPILL_DIR'):
+    spill = UploadSpill(
+        os.environ['FOODPRINT_UPLOAD_SPILL_DIR'],
+        max_bytes=int(os.environ.get('FOODPRINT_UPLOAD_SPILL_MB', 512)) * 1024 * 1024,
+        ttl_seconds=float(os.environ.get('FOODPRINT_UPLOAD_SPILL_TTL_HOURS', 24)) * 3600
+    )
+
+class LeaderboardCache:
+    """Serialized /leaderboard responses, rebuilt only when the board changes"""
+    
+    def __init__(self, max_limit=100):
+        """
+        Args:
+            max_limit (int): Largest limit served. The top max_limit users
+                are fetched once per board version and sliced per limit
+        """
+        self.max_limit = max_limit
+        self._version = None
+        self._top_users = []
+        self._responses = {}
+        self._lock = threading.Lock()
+    
+    def get(self, limit):
+        """
+        Get the serialized top users and their ETag
+        
+        Args:
+            limit (int): Number of top users, at most max_limit
+        
+        Returns:
+            tuple: (JSON body bytes, ETag)
+        """
+        board = system.leaderboard
+        with self._lock:
+            # Read the version before the users, so a contribution landing
+            # in between makes the next request refresh instead of the
+            # cache serving stale users under a newer version
+            version = (id(board), board.version)
+            if version != self._version:
+                self._top_users = board.get_top_users(self.max_limit)
+                self._responses = {}
+                self._version = version
+            response = self._responses.get(limit)
+            if response is None:
+                body = app.json.dumps(self._top_users[:limit]).encode('utf-8')
+                response = (body, hashlib.sha1(body).hexdigest()[:16])
+                self._responses[limit] = response
+            return response
+
+leaderboard_cache = LeaderboardCache()
 
 @app.route('/')
 def index():
@@ -27,22 +124,50 @@ def upload_image():
     if image.filename == '':
         return jsonify({'error': 'No image selected'}), 400
     
-    # Save image temporarily
-    image_path = os.path.join('data', 'uploads', image.filename)
-    os.makedirs(os.path.dirname(image_path), exist_ok=True)
-    image.save(image_path)
+    image_bytes = image.read()
+    if spill is not None:
+        spill.save(image_bytes, image.filename)
+    
+    if app.config['ASYNC_UPLOADS']:
+        try:
+            job_id = jobs.submit(system.analyze_fridge_image, image_bytes)
+        except queue.Full:
+            return jsonify({'error': 'Too many uploads in progress, try again shortly'}), 503, {'Retry-After': '1'}
+        status_url = url_for('job_status', job_id=job_id)
+        return jsonify({'job_id': job_id, 'status': 'queued', 'status_url': status_url}), 202, {'Location': status_url}
     
     # Analyze image
     try:
-        results = system.analyze_fridge_image(image_path)
+        results = system.analyze_fridge_image(image_bytes)
         return jsonify(results)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    
+    response = {'job_id': job_id, 'status': job['status']}
+    if job['status'] == 'done':
+        response['result'] = job['result']
+    elif job['status'] == 'failed':
+        response['error'] = job['error']
+    return jsonify(response)
+
 @app.route('/leaderboard')
 def leaderboard():
-    top_users = system.get_leaderboard()
-    return jsonify(top_users)
+    limit = request.args.get('limit', 10, type=int)
+    if not 1 <= limit <= leaderboard_cache.max_limit:
+        return jsonify({'error': f'limit must be between 1 and {leaderboard_cache.max_limit}'}), 400
+    
+    body, etag = leaderboard_cache.get(limit)
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Clients may keep the board but must revalidate, which costs a 304
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 @app.route('/add_contribution', methods=['POST'])
 def add_contribution():
@@ -56,5 +181,15 @@ def add_contribution():
     system.add_user_contribution(username, emission_results)
     return jsonify({'success': True})
 
+@app.route('/add_contributions', methods=['POST'])
+def add_contributions():
+    data = request.get_json(silent=True)
+    contributions = data.get('contributions') if isinstance(data, dict) else data
+    if not isinstance(contributions, list):
+        return jsonify({'error': 'Expected a list of contributions'}), 400
+    
+    result = system.add_user_contributions(contributions)
+    return jsonify({'success': not result['errors'], **result})
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""
+Background job queue for work that should not block request threads
+"""
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+
+class JobQueue:
+    def __init__(self, workers=2, max_pending=32, ttl_seconds=600, state_dir=None, dumps=json.dumps):
+        """
+        Args:
+            workers (int): Number of worker threads running jobs
+            max_pending (int): Number of queued jobs after which submit()
+                refuses new work
+            ttl_seconds (float): How long finished jobs can be polled. State
+                files untouched for this long are removed too, including
+                those left by exited processes, so it should exceed the
+                longest job
+            state_dir (str): Optional directory where job states are also
+                written, so processes sharing it can answer for each
+                other's jobs
+            dumps (callable): Serializes job states written to state_dir
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self.state_dir = state_dir
+        self.dumps = dumps
+        if state_dir is not None:
+            os.makedirs(state_dir, exist_ok=True)
+    
+    def _start(self):
+        """Start the workers on first use, so they exist in the serving process"""
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue a call to run on a worker thread
+        
+        Args:
+            func (callable): Function to run
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+        
+        Returns:
+            str: Job id to poll with get()
+        
+        Raises:
+            queue.Full: If max_pending jobs are already waiting
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            if not self._threads:
+                self._start()
+            self._expire()
+            self._jobs[job_id] = {'status': 'queued', 'submitted_at': time.time()}
+        self._prune_states()
+        # Published before a worker can pick the job up, so this state never
+        # overwrites a later one
+        self._write_state(job_id)
+        try:
+            self._queue.put_nowait((job_id, func, args, kwargs))
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job_id]
+            self._remove_state(job_id)
+            raise
+        return job_id
+    
+    def get(self, job_id):
+        """
+        Get the state of a job
+        
+        Args:
+            job_id (str): Id returned by submit()
+        
+        Returns:
+            dict: 'status' ('queued', 'running', 'done' or 'failed') plus
+                'result' or 'error' once finished, or None for unknown or
+                expired jobs
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        if self.state_dir is None or not job_id.isalnum():
+            return None
+        try:
+            with open(os.path.join(self.state_dir, job_id + '.json'), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def pending(self):
+        """Number of jobs waiting for a worker"""
+        return self._queue.qsize()
+    
+    def _work(self):
+        while True:
+            job_id, func, args, kwargs = self._queue.get()
+            with self._lock:
+                self._jobs[job_id]['status'] = 'running'
+            self._write_state(job_id)
+            try:
+                update = {'status': 'done', 'result': func(*args, **kwargs)}
+            except Exception as e:
+                update = {'status': 'failed', 'error': str(e)}
+            update['finished_at'] = time.time()
+            with self._lock:
+                self._jobs[job_id].update(update)
+            self._write_state(job_id)
+            self._queue.task_done()
+    
+    def _write_state(self, job_id):
+        """Publish a job's state to the shared state directory"""
+        if self.state_dir is None:
+            return
+        with self._lock:
+            job = dict(self._jobs[job_id])
+        try:
+            data = self.dumps(job)
+        except (TypeError, ValueError) as e:
+            data = json.dumps({'status': 'failed', 'error': f"Result is not serializable: {e}"})
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(self.state_dir, job_id + '.json'))
+    
+    def _expire(self):
+        """Forget finished jobs older than the TTL"""
+        cutoff = time.time() - self.ttl_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job.get('finished_at', cutoff + 1) < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+            self._remove_state(job_id)
+    
+    def _prune_states(self):
+        """Remove state files past the TTL that no job of this process owns"""
+        if self.state_dir is None:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            own = set(self._jobs)
+        for entry in os.scandir(self.state_dir):
+            if entry.name.split('.')[0] in own:
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+    
+    def _remove_state(self, job_id):
+        if self.state_dir is None:
+            return
+        try:
+            os.remove(os.path.join(self.state_dir, job_id + '.json'))
+        except FileNotFoundError:
+            pass
+    
+    def join(self):
+        """Block until every queued job has finished"""
+        self._queue.join()
+
+# Example usage
+if __name__ == "__main__":
+    jobs = JobQueue(workers=2)
+    job_id = jobs.submit(sum, [1, 2, 3])
+    jobs.join()
+    print(jobs.get(job_id))
@@ -0,0 +1,58 @@
+"""
+Production serving of the web application with preforked gunicorn workers
+"""
+import gc
+import os
+import tempfile
+
+def default_workers():
+    """One worker per CPU core"""
+    return os.cpu_count() or 1
+
+def serve(bind='127.0.0.1:5000', workers=None, threads=4, preload=True, training_data=None, timeout=60):
+    """
+    Run the web application under gunicorn
+    
+    Args:
+        bind (str): Address to listen on, as host:port
+        workers (int): Number of worker processes. Defaults to the CPU count
+        threads (int): Request threads per worker
+        preload (bool): Load the application and its read-only data in the
+            master process before forking, so workers share them
+            copy-on-write instead of each loading its own copy
+        training_data (str): Optional waste history CSV whose fitted
+            forecast model is preloaded as well
+        timeout (int): Seconds before a silent worker is restarted
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise ValueError("gunicorn is required for --serve (pip install gunicorn)")
+    
+    # Upload jobs can be polled on any worker, so workers share job states
+    os.environ.setdefault('FOODPRINT_JOB_DIR', os.path.join(tempfile.gettempdir(), 'foodprint_jobs'))
+    
+    class FoodPrintServer(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', bind)
+            self.cfg.set('workers', workers or default_workers())
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('preload_app', preload)
+            self.cfg.set('timeout', timeout)
+        
+        def load(self):
+            from src.web.app import app, system
+            if preload:
+                system.preload(training_data)
+                # Keep the preloaded objects out of the collector's
+                # generations so collections in the workers do not touch
+                # (and so copy) their pages
+                gc.freeze()
+            return app
+    
+    FoodPrintServer().run()
+
+# Example usage
+if __name__ == "__main__":
+    serve(workers=2)
@@ -18,6 +18,7 @@ document.addEventListener('DOMContentLoaded', function() {
             body: formData
         })
         .then(response => response.json())
+        .then(data => data.job_id ? waitForJob(data.status_url) : data)
         .then(data => {
             if (data.error) {
                 alert('Error: ' + data.error);
@@ -33,6 +34,22 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
     
+    // Poll an analysis job until it finishes
+    function waitForJob(statusUrl) {
+        return fetch(statusUrl)
+            .then(response => response.json())
+            .then(job => {
+                if (job.status === 'done') {
+                    return job.result;
+                }
+                if (job.status === 'failed' || job.error) {
+                    return {error: job.error};
+                }
+                return new Promise(resolve => setTimeout(resolve, 500))
+                    .then(() => waitForJob(statusUrl));
+            });
+    }
+    
     function displayResults(data) {
         let html = `
             <h3>Item yang Terdeteksi</h3>
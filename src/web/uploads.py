@@ -0,0 +1,82 @@
+"""
+Optional on-disk copies of uploaded images with bounded size and age
+"""
+import os
+import tempfile
+import threading
+import time
+import uuid
+from werkzeug.utils import secure_filename
+
+class UploadSpill:
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, ttl_seconds=24 * 3600):
+        """
+        Args:
+            directory (str): Directory the copies are written to
+            max_bytes (int): Total size of kept copies; the oldest are
+                removed beyond it
+            ttl_seconds (float): Age after which copies are removed
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+    
+    def save(self, data, filename):
+        """
+        Keep a copy of an uploaded image
+        
+        Args:
+            data (bytes): Encoded image
+            filename (str): Client-provided file name
+        
+        Returns:
+            str: Path of the copy, unique even when file names collide
+        """
+        name = f"{uuid.uuid4().hex}_{secure_filename(filename) or 'upload'}"
+        path = os.path.join(self.directory, name)
+        # Write to a temporary file first so cleanup never sees partial copies
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.cleanup()
+        return path
+    
+    def cleanup(self):
+        """Remove copies past the TTL, then the oldest beyond max_bytes"""
+        with self._lock:
+            files = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.tmp') or not entry.is_file():
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+            
+            files.sort()
+            cutoff = time.time() - self.ttl_seconds
+            total = sum(size for _, size, _ in files)
+            for mtime, size, path in files:
+                if mtime >= cutoff and total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+# Example usage
+if __name__ == "__main__":
+    spill = UploadSpill(os.path.join(tempfile.gettempdir(), 'foodprint_uploads'), max_bytes=1024)
+    print(spill.save(b'\xff\xd8' * 300, 'fridge.jpg'))
+    print(spill.save(b'\xff\xd8' * 300, 'fridge.jpg'))
+    print(sorted(os.listdir(spill.directory)))
@@ -69,5 +69,908 @@ def test_system():
     
     print("\nAll tests completed successfully!")
 
+
+def test_predict_waste_batch():
+    """Batch forecasting fits one model per household and isolates failures"""
+    import pandas as pd
+    from models.waste_predictor import FoodWastePredictor
+    
+    dates = pd.date_range(start='2023-01-01', periods=60, freq='D')
+    frames = [
+        pd.DataFrame({'household_id': household, 'ds': dates, 'y': [float(i % 7 + offset) for i in range(len(dates))]})
+        for household, offset in [('h1', 1), ('h2', 3), ('h3', 5)]
+    ]
+    # A single observation cannot be fitted and must not sink the batch
+    frames.append(pd.DataFrame({'household_id': ['broken'], 'ds': [dates[0]], 'y': [1.0]}))
+    df = pd.concat(frames, ignore_index=True)
+    
+    predictor = FoodWastePredictor(daily_seasonality=False, yearly_seasonality=False)
+    forecast, failures = predictor.predict_waste_batch(df, periods=7, max_workers=2, shard_size=2)
+    
+    assert list(failures) == ['broken']
+    assert list(forecast['household_id'].unique()) == ['h1', 'h2', 'h3']
+    assert (forecast.groupby('household_id').size() == len(dates) + 7).all()
+
+def test_model_store(tmp_path):
+    """Fitted models are reused from the store and evicted least recently used first"""
+    import pandas as pd
+    from models.model_store import ModelStore
+    from models.waste_predictor import FoodWastePredictor
+    
+    store = ModelStore(directory=str(tmp_path), max_models=2)
+    dates = pd.date_range(start='2023-01-01', periods=30, freq='D')
+    df = pd.DataFrame({'ds': dates, 'y': [float(i % 7) for i in range(len(dates))]})
+    
+    predictor = FoodWastePredictor(daily_seasonality=False, yearly_seasonality=False, model_store=store)
+    predictor.train_model(df)
+    assert predictor.model_key in store
+    
+    restored = FoodWastePredictor(daily_seasonality=False, yearly_seasonality=False, model_store=store)
+    restored.model.fit = None  # fitting again would fail the test
+    restored.train_model(df)
+    assert restored.model_key == predictor.model_key
+    assert restored.predict_waste(periods=3)['yhat'].round(6).equals(predictor.predict_waste(periods=3)['yhat'].round(6))
+    
+    # Different seasonality settings produce a different model
+    other = FoodWastePredictor(daily_seasonality=False, weekly_seasonality=False, yearly_seasonality=False, model_store=store)
+    other.train_model(df)
+    assert other.model_key != predictor.model_key
+    
+    store.invalidate(predictor.model_key)
+    assert predictor.model_key not in store
+    
+    for offset in range(3):
+        FoodWastePredictor(daily_seasonality=False, yearly_seasonality=False, model_store=store).train_model(df.assign(y=df['y'] + offset))
+    assert len(store.cache) == 2
+
+def test_update_warm_start():
+    """New observations extend the history and refit from the previous parameters"""
+    import pandas as pd
+    from models.waste_predictor import FoodWastePredictor
+    
+    dates = pd.date_range(start='2023-01-01', periods=45, freq='D')
+    df = pd.DataFrame({'ds': dates, 'y': [float(i % 7 + 2) for i in range(len(dates))]})
+    
+    predictor = FoodWastePredictor(daily_seasonality=False, yearly_seasonality=False)
+    predictor.train_model(df.iloc[:40])
+    previous_model = predictor.model
+    
+    predictor.update(df.iloc[40:])
+    assert predictor.model is not previous_model
+    assert len(predictor.model.history) == 45
+    
+    # Re-sending a known date replaces its value instead of duplicating it
+    predictor.update(pd.DataFrame({'ds': [dates[-1]], 'y': [20.0]}))
+    assert len(predictor.training_data) == 45
+    assert predictor.training_data['y'].iloc[-1] == 20.0
+    assert len(predictor.predict_waste(periods=5)) == 50
+
+def test_predict_waste_cache():
+    """Forecasts are computed once per model version and sliced for shorter horizons"""
+    import pandas as pd
+    from models.waste_predictor import FoodWastePredictor
+    
+    dates = pd.date_range(start='2023-01-01', periods=40, freq='D')
+    df = pd.DataFrame({'ds': dates, 'y': [float(i % 7 + 2) for i in range(len(dates))]})
+    predictor = FoodWastePredictor(daily_seasonality=False, yearly_seasonality=False, forecast_horizon=30)
+    predictor.train_model(df)
+    
+    calls = []
+    predict = predictor.model.predict
+    predictor.model.predict = lambda future: calls.append(len(future)) or predict(future)
+    
+    full = predictor.predict_waste(periods=14)
+    assert len(full) == 54
+    assert calls == [70]
+    
+    shorter = predictor.predict_waste(periods=7)
+    future = predictor.predict_waste(periods=7, include_history=False)
+    assert calls == [70]
+    assert shorter.equals(full.iloc[:47])
+    assert list(future['ds']) == list(full['ds'].iloc[40:47])
+    
+    # A longer horizon than cached or a refitted model computes again
+    assert len(predictor.predict_waste(periods=60)) == 100
+    assert calls == [70, 100]
+    version = predictor.model_version
+    predictor.update(pd.DataFrame({'ds': [dates[-1] + pd.Timedelta(days=1)], 'y': [3.0]}))
+    assert predictor.model_version == version + 1
+    assert len(predictor.predict_waste(periods=5, include_history=False)) == 5
+
+def _imported_modules(args, cwd):
+    """Run a Python command under -X importtime and map module name -> cumulative microseconds"""
+    import subprocess
+    
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=cwd, capture_output=True, text=True, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+def test_startup_avoids_heavy_imports(tmp_path):
+    """CLI help and the leaderboard do not import pandas, Prophet or OpenCV"""
+    root = os.path.join(os.path.dirname(__file__), '..')
+    heavy = {'pandas', 'prophet', 'cv2'}
+    
+    # Run from tmp_path so the default leaderboard files land there
+    code = (
+        f"import sys; sys.path.insert(0, {os.path.abspath(os.path.join(root, 'src'))!r})\n"
+        "from models.coordinator import FoodPrintForecast; FoodPrintForecast().get_leaderboard()"
+    )
+    modules = _imported_modules(['-c', code], cwd=str(tmp_path))
+    assert (tmp_path / 'data').is_dir()
+    assert not heavy & set(modules)
+    assert modules['models.coordinator'] < 1_000_000
+    
+    modules = _imported_modules([os.path.join('src', 'main.py')], cwd=root)
+    assert not heavy & set(modules)
+
+def test_leaderboard_log_and_compaction(tmp_path):
+    """Contributions are logged, replayed on load and compacted into the snapshot"""
+    import json
+    from models.leaderboard import Leaderboard
+    
+    data_file = tmp_path / 'leaderboard.json'
+    # Existing boards in the legacy list format are migrated on load
+    data_file.write_text(json.dumps([
+        {'username': 'Bob', 'total_emissions_avoided': 3.2, 'total_items_saved': 4,
+         'contributions': 1, 'last_contribution': '2025-09-06T00:46:51'}
+    ]))
+    
+    board = Leaderboard(data_file=str(data_file), compact_every=3)
+    board.add_user_contribution('Alice', 5.0, 8)
+    board.add_user_contribution('Charlie', 1.0, 1)
+    assert [user['username'] for user in board.get_top_users()] == ['Alice', 'Bob', 'Charlie']
+    assert len((tmp_path / 'leaderboard.log').read_text().splitlines()) == 2
+    
+    board.add_user_contribution('Charlie', 4.0, 2)
+    # The third contribution triggered a compaction
+    assert (tmp_path / 'leaderboard.log').read_text() == ''
+    assert json.loads(data_file.read_text())['last_seq'] == 3
+    board.add_user_contribution('Bob', 0.5, 1)
+    board.close()
+    
+    # A torn line from an interrupted write is ignored on replay
+    with open(tmp_path / 'leaderboard.log', 'a') as f:
+        f.write('{"seq": 5, "username"')
+    
+    reloaded = Leaderboard(data_file=str(data_file))
+    assert [(user['username'], user['contributions']) for user in reloaded.get_top_users()] == [
+        ('Alice', 1), ('Charlie', 2), ('Bob', 2)
+    ]
+    assert reloaded.get_user_rank('Bob') == 3
+    assert reloaded.get_user_rank('Nobody') is None
+    
+    reloaded.add_user_contribution('Bob', 2.0, 1)
+    reloaded.close()
+    assert Leaderboard(data_file=str(data_file)).get_user_rank('Bob') == 1
+
+def test_leaderboard_rank_queries(tmp_path):
+    """Ranks, top-k and neighbour windows follow the emissions ordering"""
+    from models.leaderboard import Leaderboard
+    
+    board = Leaderboard(data_file=str(tmp_path / 'leaderboard.json'))
+    for i in range(10):
+        board.add_user_contribution(f"user{i}", float(i), 1)
+    board.add_user_contribution('user0', 4.5, 1)
+    
+    assert [user['username'] for user in board.get_top_users(3)] == ['user9', 'user8', 'user7']
+    assert board.get_user_rank('user0') == 6
+    assert [(user['rank'], user['username']) for user in board.get_users_around('user0', window=1)] == [
+        (5, 'user5'), (6, 'user0'), (7, 'user4')
+    ]
+    assert [user['rank'] for user in board.get_users_around('user9', window=2)] == [1, 2, 3]
+    assert board.get_users_around('Nobody') is None
+    assert len(board) == 10
+    
+    # Readers get copies, so mutating them cannot corrupt the ranking
+    board.leaderboard[0]['total_emissions_avoided'] = -1.0
+    board.get_top_users(1)[0]['total_emissions_avoided'] = -1.0
+    assert board.get_top_users(1)[0]['total_emissions_avoided'] == 9.0
+    board.add_user_contribution('user9', 1.0, 1)
+    assert board.get_user_rank('user9') == 1
+
+def test_leaderboard_concurrent_writers(tmp_path):
+    """Concurrent contributions are neither lost in memory nor in the log"""
+    import threading
+    from models.leaderboard import Leaderboard
+    
+    for run, (flush_interval_ms, compact_every) in enumerate([(0, 5000), (20, 5000), (20, 150)]):
+        data_file = str(tmp_path / f"leaderboard{run}.json")
+        board = Leaderboard(data_file=data_file, compact_every=compact_every, flush_interval_ms=flush_interval_ms, max_pending=50)
+        
+        def contribute(worker):
+            for i in range(100):
+                board.add_user_contribution(f"user{i % 5}", 1.0, 1)
+                board.add_user_contribution(f"worker{worker}", 0.5, 1)
+        
+        threads = [threading.Thread(target=contribute, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        board.close()
+        
+        for board in (board, Leaderboard(data_file=data_file)):
+            totals = {user['username']: user['contributions'] for user in board.leaderboard}
+            assert sum(totals.values()) == 1600
+            assert all(totals[f"user{i}"] == 160 for i in range(5))
+            assert board.get_top_users(1)[0]['total_emissions_avoided'] == 160.0
+        board.close()
+
+def test_analyze_batch():
+    """Vectorized batch analysis matches the per-fridge components"""
+    system = FoodPrintForecast()
+    households = {
+        'h1': [
+            {'name': 'tomato', 'quantity': 3, 'days_until_expiry': 2},
+            {'name': 'banana', 'quantity': 2, 'days_until_expiry': 1},
+            {'name': 'bread', 'quantity': 1, 'days_until_expiry': 3},
+            {'name': 'milk', 'quantity': 1, 'days_until_expiry': 5}
+        ],
+        'h2': [
+            {'name': 'beef', 'quantity': 2, 'days_until_expiry': 0},
+            {'name': 'durian', 'quantity': 1, 'days_until_expiry': 1}
+        ],
+        'h3': [],
+        # 8.5 * 0.45 = 3.825 rounds to 3.83 with round() but 3.82 with np.round()
+        'h4': [{'name': 'cheese', 'quantity': 0.45, 'days_until_expiry': 1}]
+    }
+    
+    results = system.analyze_batch(households)
+    assert list(results.index) == ['h1', 'h2', 'h3', 'h4']
+    assert results.loc['h4', 'avoided_emissions_kg'] == 3.83
+    for household, items in households.items():
+        waste = system.waste_predictor.calculate_waste_from_items(items)
+        emissions = system.emission_calculator.calculate_avoided_emissions(items)
+        row = results.loc[household]
+        assert row['total_items'] == waste['total_items']
+        assert row['expiring_soon'] == waste['expiring_soon']
+        assert row['estimated_waste_percentage'] == waste['estimated_waste_percentage']
+        assert row['avoided_emissions_kg'] == emissions['avoided_emissions_kg']
+
+def test_shared_inventory_threshold(tmp_path):
+    """One precomputed inventory drives waste, recipes and emissions with the configured threshold"""
+    from models.inventory import Inventory
+    
+    system = FoodPrintForecast(expiry_threshold=1, detection_cache_dir=str(tmp_path))
+    image_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'uploads', 'indomie.jpg')
+    results = system.analyze_fridge_image(image_path)
+    
+    # Only the banana expires within one day
+    assert results['waste_prediction']['expiring_soon'] == 2
+    assert results['emission_results']['items_saved'] == 2
+    assert all('banana' in recipe['ingredients'] for recipe in results['recommended_recipes'])
+    
+    inventory = Inventory(results['detected_items'], expiry_threshold=3)
+    assert Inventory.from_items(inventory) is inventory
+    assert inventory.expiring_names == {'tomato', 'banana', 'bread'}
+    assert inventory.expiring_quantity_by_name == {'tomato': 3, 'banana': 2, 'bread': 1}
+    assert system.waste_predictor.calculate_waste_from_items(inventory)['expiring_soon'] == 6
+
+def test_recipe_ingredient_index():
+    """Recipes are found through the ingredient index and ranked by coverage"""
+    from models.recipe_recommender import RecipeRecommender
+    
+    recommender = RecipeRecommender({
+        'omelette': {'name': 'Omelette', 'ingredients': ['egg', 'milk'], 'instructions': '', 'preparation_time': 10},
+        'toast': {'name': 'Toast', 'ingredients': ['bread'], 'instructions': '', 'preparation_time': 5},
+        'french_toast': {'name': 'French Toast', 'ingredients': ['bread', 'egg', 'milk'], 'instructions': '', 'preparation_time': 15},
+        'salad': {'name': 'Salad', 'ingredients': ['lettuce'], 'instructions': '', 'preparation_time': 5}
+    })
+    bread = recommender.food_catalog.food_id('bread')
+    assert recommender.ingredient_index[bread] == ['toast', 'french_toast']
+    
+    recipes = recommender.recommend_recipes([
+        {'name': 'bread', 'quantity': 1, 'days_until_expiry': 1},
+        {'name': 'egg', 'quantity': 6, 'days_until_expiry': 2},
+        {'name': 'milk', 'quantity': 1, 'days_until_expiry': 9},
+        {'name': 'lettuce', 'quantity': 1, 'days_until_expiry': 8}
+    ])
+    assert [recipe['name'] for recipe in recipes] == ['French Toast', 'Omelette', 'Toast']
+
+def test_recipe_catalog(tmp_path):
+    """The on-disk catalog serves full recipes while matching only needs the index"""
+    from models.recipe_catalog import RecipeCatalog
+    from models.recipe_recommender import RecipeRecommender
+    
+    recipes = {
+        'soup': {'name': 'Soup', 'ingredients': ['tomato', 'chicken'], 'instructions': '1. Simmer\n2. Serve hot (80°C)', 'preparation_time': 40},
+        'plain_rice': {'name': 'Plain Rice', 'ingredients': ['rice'], 'instructions': '', 'preparation_time': 20}
+    }
+    index_path = str(tmp_path / 'recipes.csv')
+    RecipeCatalog.write(recipes, index_path)
+    
+    catalog = RecipeCatalog(index_path)
+    assert list(catalog) == ['soup', 'plain_rice']
+    assert dict(catalog.ingredient_lists()) == {'soup': ['tomato', 'chicken'], 'plain_rice': ['rice']}
+    assert {recipe_id: catalog[recipe_id] for recipe_id in catalog} == recipes
+    
+    recommender = RecipeRecommender(catalog)
+    assert recommender.recommend_recipes([{'name': 'chicken', 'quantity': 1, 'days_until_expiry': 1}]) == [recipes['soup']]
+    catalog.close()
+    
+    # The default recommender reads the catalog shipped in data/
+    default = RecipeRecommender()
+    assert isinstance(default.recipe_database, RecipeCatalog)
+    assert default.get_recipe_details('fruit_smoothie')['instructions'] == '1. Blend bananas with milk\n2. Serve cold'
+
+def test_recipe_top_k_scoring(tmp_path):
+    """Recipes are scored by quantity and urgency and only the best k are returned"""
+    from models.recipe_recommender import RecipeRecommender
+    
+    recommender = RecipeRecommender({
+        'smoothie': {'name': 'Smoothie', 'ingredients': ['banana', 'milk'], 'instructions': '', 'preparation_time': 5},
+        'stew': {'name': 'Stew', 'ingredients': ['beef', 'tomato'], 'instructions': '', 'preparation_time': 60},
+        'salad': {'name': 'Salad', 'ingredients': ['tomato', 'lettuce'], 'instructions': '', 'preparation_time': 10},
+        'burger': {'name': 'Burger', 'ingredients': ['beef', 'bread'], 'instructions': '', 'preparation_time': 20}
+    })
+    food_items = [
+        {'name': 'banana', 'quantity': 1, 'days_until_expiry': 3},
+        {'name': 'tomato', 'quantity': 4, 'days_until_expiry': 2},
+        {'name': 'beef', 'quantity': 1, 'days_until_expiry': 0},
+        {'name': 'lettuce', 'quantity': 1, 'days_until_expiry': 1}
+    ]
+    
+    scores = recommender.score_recipes(food_items)
+    assert scores == {'smoothie': 0.25, 'stew': 3.0, 'salad': 2.75, 'burger': 1.0}
+    assert [recipe['name'] for recipe in recommender.recommend_recipes(food_items, top_k=2)] == ['Stew', 'Salad']
+    assert [recipe['name'] for recipe in recommender.recommend_recipes(food_items)] == ['Stew', 'Salad', 'Burger', 'Smoothie']
+    
+    system = FoodPrintForecast(recipe_top_k=1, detection_cache_dir=str(tmp_path))
+    image_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'uploads', 'indomie.jpg')
+    assert [recipe['name'] for recipe in system.analyze_fridge_image(image_path)['recommended_recipes']] == ['Banana Bread']
+
+def test_meal_planner():
+    """The planner picks recipes that save the most expiring food before it spoils"""
+    from models.emission_calculator import EmissionCalculator
+    from models.meal_planner import MealPlanner
+    from models.recipe_recommender import RecipeRecommender
+    
+    recommender = RecipeRecommender({
+        'steak': {'name': 'Steak', 'ingredients': ['beef'], 'instructions': '', 'preparation_time': 15},
+        'blt': {'name': 'BLT', 'ingredients': ['bread', 'lettuce', 'tomato'], 'instructions': '', 'preparation_time': 10},
+        'toast': {'name': 'Toast', 'ingredients': ['bread'], 'instructions': '', 'preparation_time': 5}
+    })
+    calculator = EmissionCalculator()
+    food_items = [
+        {'name': 'beef', 'quantity': 1, 'days_until_expiry': 1},
+        {'name': 'bread', 'quantity': 2, 'days_until_expiry': 0},
+        {'name': 'lettuce', 'quantity': 1, 'days_until_expiry': 3},
+        {'name': 'tomato', 'quantity': 1, 'days_until_expiry': 2},
+        {'name': 'milk', 'quantity': 1, 'days_until_expiry': 2}
+    ]
+    
+    plan = MealPlanner(recommender, calculator).plan_meals(food_items, days=3, meals_per_day=2)
+    assert [[recipe['name'] for recipe in day['recipes']] for day in plan['days']] == [['Steak', 'BLT'], [], []]
+    # Steak saves beef (27.0), BLT saves bread, lettuce and tomato (1.0 + 0.3 + 1.1)
+    assert plan['emission_results']['avoided_emissions_kg'] == 29.4
+    assert plan['emission_results']['items_saved'] == 4
+    
+    # Recipes used later than an item's expiry do not save it
+    late_toast = [dict(recommender.recipe_database['toast'], day=1)]
+    assert calculator.calculate_avoided_emissions(food_items, recipes_used=late_toast)['items_saved'] == 0
+    
+    system = FoodPrintForecast()
+    assert system.plan_meals(food_items, days=1)['days'][0]['recipes'][0]['name'] == 'Scrambled Eggs'
+
+def test_emission_factor_table():
+    """Emission factors come from the food database and batch totals match per-item results"""
+    import numpy as np
+    from models.emission_calculator import EmissionCalculator
+    
+    calculator = EmissionCalculator()
+    assert calculator.get_food_footprint('beef') == 27.0
+    assert len(calculator.food_catalog) == 14
+    
+    codes = calculator.encode_foods(['tomato', 'beef', 'durian'])
+    assert codes[2] == calculator.unknown_food_code
+    assert list(calculator.get_food_footprints(['tomato', 'beef', 'durian'])) == [1.1, 27.0, 1.0]
+    
+    quantities = np.array([3.0, 2.0, 1.0])
+    assert calculator.calculate_avoided_emissions_batch(codes, quantities) == 3.3 + 54.0 + 1.0
+    # A 150 g tomato, a 400 g steak and a 2 kg durian
+    weights = np.array([0.15, 0.4, 2.0])
+    assert round(calculator.calculate_avoided_emissions_batch(codes, quantities, weights=weights), 6) == round(3.3 * 0.15 + 54.0 * 0.4 + 2.0, 6)
+    per_group = calculator.calculate_avoided_emissions_batch(codes, quantities, groups=np.array([1, 1, 0]), n_groups=3)
+    assert list(per_group) == [1.0, 3.3 + 54.0, 0.0]
+
+def test_food_catalog_shared(tmp_path):
+    """Every component shares one immutable food catalog with integer ids"""
+    import pytest
+    from models.food_catalog import get_food_catalog
+    
+    system = FoodPrintForecast(detection_cache_dir=str(tmp_path))
+    catalog = get_food_catalog()
+    assert system.image_analyzer.food_catalog is catalog
+    assert system.emission_calculator.food_catalog is catalog
+    assert system.recipe_recommender.food_catalog is catalog
+    
+    tomato = catalog.get('tomato')
+    assert catalog[catalog.food_id('tomato')] is tomato
+    assert (tomato.local_name, tomato.shelf_life_days, tomato.carbon_footprint) == ('Tomat', 7, 1.1)
+    assert system.image_analyzer.get_food_info('lettuce') == {'name': 'Selada', 'shelf_life': 3, 'carbon_footprint': 0.3}
+    assert catalog.food_id('durian') == catalog.unknown_id
+    with pytest.raises(AttributeError):
+        tomato.carbon_footprint = 0.0
+    with pytest.raises(AttributeError):
+        tomato.extra = 1
+    with pytest.raises(ValueError):
+        catalog.emission_factors[0] = 0.0
+
+def test_compact_inventory_types(tmp_path):
+    """FoodItem records and InventoryBatch columns work wherever item dicts do"""
+    import json
+    import pytest
+    from models.inventory import FoodItem, InventoryBatch, serialize_items
+    
+    system = FoodPrintForecast(detection_cache_dir=str(tmp_path))
+    dict_items = [
+        {'name': 'tomato', 'quantity': 3, 'days_until_expiry': 2},
+        {'name': 'banana', 'quantity': 2, 'days_until_expiry': 1},
+        {'name': 'milk', 'quantity': 1, 'days_until_expiry': 5}
+    ]
+    records = [FoodItem.from_dict(item) for item in dict_items]
+    batch = InventoryBatch.from_households({'h1': records[:2], 'h2': records[2:]})
+    assert not hasattr(records[0], '__dict__')
+    assert records[0].__hash__ is None
+    assert records == dict_items
+    assert batch.nbytes == 20 * len(batch)
+    assert batch.to_dict() == {'h1': dict_items[:2], 'h2': dict_items[2:]}
+    assert list(batch) == dict_items
+    
+    assert system.waste_predictor.calculate_waste_from_items(records) == system.waste_predictor.calculate_waste_from_items(dict_items)
+    assert system.recipe_recommender.recommend_recipes(records) == system.recipe_recommender.recommend_recipes(dict_items)
+    assert system.emission_calculator.calculate_avoided_emissions(records) == system.emission_calculator.calculate_avoided_emissions(dict_items)
+    
+    # A whole batch would merge its households, so per-fridge components
+    # only take one household's items
+    h1_items = batch.household_items('h1')
+    assert h1_items == dict_items[:2]
+    assert system.emission_calculator.calculate_avoided_emissions(h1_items) == system.emission_calculator.calculate_avoided_emissions(dict_items[:2])
+    for analyze in (system.waste_predictor.calculate_waste_from_items, system.recipe_recommender.recommend_recipes,
+                    system.emission_calculator.calculate_avoided_emissions, system.plan_meals):
+        with pytest.raises(TypeError):
+            analyze(batch)
+    fractional = InventoryBatch.from_households({'h': [{'name': 'rice', 'quantity': 1.5, 'days_until_expiry': 2}]})
+    assert fractional.household_items('h')[0].quantity == 1.5
+    
+    assert json.dumps(serialize_items(records)) == json.dumps(dict_items)
+    
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+    from src.web.app import app
+    image_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'uploads', 'indomie.jpg')
+    results = json.loads(app.json.dumps(system.analyze_fridge_image(image_path)))
+    assert results['detected_items'][0] == {'name': 'tomato', 'quantity': 3, 'days_until_expiry': 2}
+
+def test_batched_image_inference(tmp_path):
+    """Images are batched through one forward pass of a detector loaded once"""
+    import shutil
+    import pytest
+    from models.image_recognition import FridgeImageAnalyzer
+    
+    image_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'uploads', 'indomie.jpg')
+    paths = []
+    for i in range(3):
+        paths.append(str(tmp_path / f'fridge_{i}.jpg'))
+        shutil.copy(image_path, paths[-1])
+    
+    analyzer = FridgeImageAnalyzer(batch_size=2)
+    assert analyzer.model is FridgeImageAnalyzer().model
+    inputs = analyzer._inputs
+    batch_sizes = []
+    run = analyzer.model.run
+    analyzer.model = type('Recorder', (), {
+        'input_size': analyzer.model.input_size,
+        'labels': analyzer.model.labels,
+        'run': staticmethod(lambda batch: batch_sizes.append(len(batch)) or run(batch))
+    })()
+    
+    results = analyzer.analyze_images(paths)
+    assert batch_sizes == [2, 1]
+    assert analyzer._inputs is inputs
+    assert results[0] == results[2] == analyzer.analyze_image(image_path)
+    assert [item['name'] for item in results[0]] == ['tomato', 'banana', 'bread', 'milk']
+    
+    with pytest.raises(ValueError):
+        analyzer.analyze_images([str(tmp_path / 'missing.jpg')])
+    with pytest.raises(ValueError):
+        FridgeImageAnalyzer(model_path=str(tmp_path / 'detector.tflite'))
+
+def test_image_decode_pipeline(tmp_path):
+    """Large photos are decoded at reduced resolution across worker threads"""
+    import cv2
+    import numpy as np
+    from models.image_recognition import FridgeImageAnalyzer, _decode_flag
+    
+    # A 12MP phone photo only needs an eighth of its resolution for a 16x16 input
+    assert _decode_flag((4000, 3000), (16, 16)) == cv2.IMREAD_REDUCED_COLOR_8
+    assert _decode_flag((100, 50), (16, 16)) == cv2.IMREAD_REDUCED_COLOR_2
+    assert _decode_flag((20, 20), (16, 16)) == cv2.IMREAD_COLOR
+    
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(5):
+        paths.append(str(tmp_path / f'photo_{i}.jpg'))
+        cv2.imwrite(paths[-1], rng.integers(0, 256, (600, 800, 3), dtype=np.uint8))
+    paths.append(str(tmp_path / 'photo.png'))
+    cv2.imwrite(paths[-1], rng.integers(0, 256, (60, 80, 3), dtype=np.uint8))
+    
+    analyzer = FridgeImageAnalyzer(batch_size=2, decode_workers=3)
+    threaded = analyzer.analyze_images(paths)
+    inline = FridgeImageAnalyzer(batch_size=4, decode_workers=0).analyze_images(paths)
+    assert threaded == inline
+    assert len(threaded) == 6
+    
+    # close() stops the decode threads and a later analysis starts new ones
+    executor = analyzer._executor
+    system = FoodPrintForecast()
+    system._components['image_analyzer'] = analyzer
+    system.close()
+    assert analyzer._executor is None
+    assert executor._shutdown and not any(thread.is_alive() for thread in executor._threads)
+    assert analyzer.analyze_images(paths[:2]) == threaded[:2]
+    analyzer.close()
+
+def test_detection_result_cache(tmp_path):
+    """Re-uploaded photos are answered from the cache without decoding"""
+    import shutil
+    from models.disk_cache import DiskLRUCache
+    from models.image_recognition import FridgeImageAnalyzer
+    
+    image_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'uploads', 'indomie.jpg')
+    copy_path = str(tmp_path / 'same_photo.jpg')
+    shutil.copy(image_path, copy_path)
+    
+    cache = DiskLRUCache(str(tmp_path / 'detections'), max_entries=2, suffix='.json')
+    analyzer = FridgeImageAnalyzer(result_cache=cache)
+    decoded = []
+    load_image = analyzer._load_image
+    analyzer._load_image = lambda image, out: decoded.append(image) or load_image(image, out)
+    
+    first = analyzer.analyze_image(image_path)
+    assert len(decoded) == 1 and len(cache) == 1
+    # Same bytes under another name and passed in memory are both hits
+    with open(image_path, 'rb') as f:
+        image_bytes = f.read()
+    assert analyzer.analyze_images([copy_path, image_bytes]) == [first, first]
+    assert len(decoded) == 1
+    
+    # Results are keyed by model version too
+    analyzer.model = type('Retrained', (), {
+        'input_size': analyzer.model.input_size,
+        'labels': analyzer.model.labels,
+        'run': analyzer.model.run,
+        'version': 'retrained'
+    })()
+    assert analyzer.analyze_image(copy_path) == first
+    assert len(decoded) == 2 and len(cache) == 2
+
+def test_upload_job_queue(tmp_path):
+    """Uploads are queued, polled for results and refused when the queue is full"""
+    import io
+    import queue
+    import threading
+    import pytest
+    from src.web.jobs import JobQueue
+    
+    started = threading.Event()
+    release = threading.Event()
+    
+    def block():
+        started.set()
+        assert release.wait(timeout=10)
+    
+    jobs = JobQueue(workers=1, max_pending=1)
+    blocked = jobs.submit(block)
+    assert started.wait(timeout=10)
+    waiting = jobs.submit(sum, [1, 2])
+    with pytest.raises(queue.Full):
+        jobs.submit(sum, [3])
+    release.set()
+    jobs.join()
+    assert jobs.get(blocked)['status'] == 'done'
+    assert jobs.get(waiting)['status'] == 'done'
+    assert jobs.get(waiting)['result'] == 3
+    failed = jobs.submit(int, 'not a number')
+    jobs.join()
+    assert jobs.get(failed)['status'] == 'failed'
+    
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+    from src.web.app import app, system, jobs as upload_jobs
+    image_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'uploads', 'indomie.jpg')
+    with open(image_path, 'rb') as f:
+        image_bytes = f.read()
+    # The app's analyzer is built on first use, with this cache directory
+    cache_dir = system.detection_cache_dir
+    system._components.pop('image_analyzer', None)
+    system.detection_cache_dir = str(tmp_path / 'detections')
+    try:
+        client = app.test_client()
+        response = client.post('/upload', data={'fridge_image': (io.BytesIO(image_bytes), 'not_saved.jpg')})
+        assert response.status_code == 202
+        # The upload is decoded from memory rather than saved under data/uploads
+        assert not os.path.exists(os.path.join(os.path.dirname(image_path), 'not_saved.jpg'))
+        upload_jobs.join()
+        job = client.get(response.get_json()['status_url']).get_json()
+        assert job['status'] == 'done'
+        assert job['result']['detected_items'][0] == {'name': 'tomato', 'quantity': 3, 'days_until_expiry': 2}
+        assert len(os.listdir(tmp_path / 'detections')) == 1
+        assert client.get('/jobs/unknown').status_code == 404
+    finally:
+        system._components.pop('image_analyzer', None)
+        system.detection_cache_dir = cache_dir
+
+def test_upload_spill(tmp_path):
+    """Spilled uploads get unique names and are bounded in size and age"""
+    import time
+    from src.web.uploads import UploadSpill
+    
+    spill = UploadSpill(str(tmp_path), max_bytes=250, ttl_seconds=60)
+    first = spill.save(b'a' * 100, '../fridge.jpg')
+    second = spill.save(b'b' * 100, '../fridge.jpg')
+    assert first != second
+    assert os.path.dirname(first) == os.path.dirname(second) == str(tmp_path)
+    
+    # The oldest copy goes once the size cap is exceeded
+    os.utime(first, (time.time() - 10, time.time() - 10))
+    third = spill.save(b'c' * 100, 'fridge.jpg')
+    assert sorted(os.listdir(tmp_path)) == sorted([os.path.basename(second), os.path.basename(third)])
+    
+    # And every copy once it is past the TTL
+    os.utime(second, (time.time() - 120, time.time() - 120))
+    spill.cleanup()
+    assert os.listdir(tmp_path) == [os.path.basename(third)]
+
+def test_preload_and_shared_job_state(tmp_path):
+    """Preloading builds the read-only components and job states are shared"""
+    from src.web.jobs import JobQueue
+    
+    system = FoodPrintForecast(detection_cache_dir=str(tmp_path / 'detections'))
+    system.preload()
+    assert {'image_analyzer', 'recipe_recommender', 'emission_calculator', 'meal_planner', 'waste_predictor'} <= set(system._components)
+    # The leaderboard's log and flusher thread belong to each server worker
+    assert 'leaderboard' not in system._components
+    
+    # A job run by one process can be polled on another sharing state_dir
+    running = JobQueue(workers=1, state_dir=str(tmp_path))
+    polling = JobQueue(workers=1, state_dir=str(tmp_path))
+    job_id = running.submit(sum, [1, 2])
+    running.join()
+    assert polling.get(job_id)['result'] == 3
+    assert polling.get('../etc') is None
+    
+    # State files of exited processes are pruned once past the TTL
+    import time
+    stale = [tmp_path / 'deadbeef.json', tmp_path / 'tmpdead.tmp']
+    for path in stale:
+        path.write_text('{}')
+        os.utime(path, (time.time() - 3600, time.time() - 3600))
+    polling.submit(sum, [])
+    polling.join()
+    assert not any(path.exists() for path in stale)
+    assert polling.get(job_id)['result'] == 3
+
+def test_leaderboard_http_cache(tmp_path):
+    """The serialized leaderboard is reused until a contribution lands"""
+    from models.leaderboard import Leaderboard
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+    from src.web import app as web
+    
+    board = Leaderboard(data_file=str(tmp_path / 'leaderboard.json'))
+    board.add_user_contribution('Alice', 5.0, 8)
+    board.add_user_contribution('Bob', 3.0, 4)
+    previous_board = web.system._components.get('leaderboard')
+    web.system._components['leaderboard'] = board
+    try:
+        client = web.app.test_client()
+        response = client.get('/leaderboard?limit=1')
+        assert [user['username'] for user in response.get_json()] == ['Alice']
+        etag = response.headers['ETag']
+        
+        fetched = []
+        get_top_users = board.get_top_users
+        board.get_top_users = lambda limit: fetched.append(limit) or get_top_users(limit)
+        assert client.get('/leaderboard?limit=1', headers={'If-None-Match': etag}).status_code == 304
+        assert len(client.get('/leaderboard').get_json()) == 2
+        assert fetched == []
+        
+        board.add_user_contribution('Bob', 3.0, 4)
+        response = client.get('/leaderboard?limit=1', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.get_json()[0]['username'] == 'Bob'
+        assert fetched == [web.leaderboard_cache.max_limit]
+        assert client.get('/leaderboard?limit=0').status_code == 400
+    finally:
+        if previous_board is None:
+            web.system._components.pop('leaderboard')
+        else:
+            web.system._components['leaderboard'] = previous_board
+
+def test_bulk_contributions(tmp_path):
+    """Batches are applied with one log write and report per-record errors"""
+    from models.leaderboard import Leaderboard
+    
+    board = Leaderboard(data_file=str(tmp_path / 'leaderboard.json'))
+    board.add_user_contribution('Alice', 5.0, 8)
+    writes = []
+    write_log = board._write_log
+    board._write_log = lambda records: writes.append(len(records)) or write_log(records)
+    
+    result = board.add_user_contributions([
+        ('Bob', 3.0, 4),
+        ('Alice', 1.0, 1),
+        ('', 1.0, 1),
+        ('Carol', float('nan'), 1),
+        ('Bob', 4.0, 2),
+        ('Dave',)
+    ])
+    assert result['accepted'] == 3
+    assert [error['index'] for error in result['errors']] == [2, 3, 5]
+    assert writes == [3]
+    assert [(user['username'], user['total_emissions_avoided']) for user in board.get_top_users()] == [('Bob', 7.0), ('Alice', 6.0)]
+    assert board.get_user_rank('Alice') == 2
+    assert [user['username'] for user in Leaderboard(data_file=str(tmp_path / 'leaderboard.json')).get_top_users()] == ['Bob', 'Alice']
+    
+    system = FoodPrintForecast()
+    system._components['leaderboard'] = board
+    result = system.add_user_contributions([
+        {'username': 'Erin', 'emission_results': {'avoided_emissions_kg': 9.0, 'items_saved': 3}},
+        {'username': 'Frank'},
+        {'username': 'Gina', 'emission_results': {'avoided_emissions_kg': -1.0, 'items_saved': 3}}
+    ])
+    assert result['accepted'] == 1
+    assert [error['index'] for error in result['errors']] == [1, 2]
+    assert board.get_user_rank('Erin') == 1
+
+def test_inventory_batch_fractional_quantities():
+    """Batch analysis keeps fractional quantities like the per-fridge components"""
+    items = [{'name': 'rice', 'quantity': 1.5, 'days_until_expiry': 2}]
+    system = FoodPrintForecast()
+    batch = system.analyze_batch({'h': items})
+    waste = system.waste_predictor.calculate_waste_from_items(items)
+    assert batch['total_items'].iloc[0] == waste['total_items'] == 1.5
+    assert batch['expiring_soon'].iloc[0] == waste['expiring_soon'] == 1.5
+
+def test_leaderboard_contributions_after_close(tmp_path):
+    """Contributions made after close() are still written to the log"""
+    from models.leaderboard import Leaderboard
+    
+    data_file = str(tmp_path / 'leaderboard.json')
+    board = Leaderboard(data_file=data_file, flush_interval_ms=10_000)
+    board.add_user_contribution('Alice', 1.0, 1)
+    board.close()
+    board.add_user_contribution('Bob', 2.0, 1)
+    assert len((tmp_path / 'leaderboard.log').read_text().splitlines()) == 2
+    board.close()
+    assert [user['username'] for user in Leaderboard(data_file=data_file).get_top_users()] == ['Bob', 'Alice']
+
+def test_leaderboard_multiple_processes(tmp_path):
+    """Processes sharing one board never lose each other's contributions"""
+    import subprocess
+    from models.leaderboard import Leaderboard
+    
+    data_file = str(tmp_path / 'leaderboard.json')
+    # Two instances in one process behave like two server workers
+    a = Leaderboard(data_file=data_file, compact_every=3)
+    b = Leaderboard(data_file=data_file, compact_every=3)
+    b.add_user_contribution('Bob', 1.0, 1)
+    b.add_user_contribution('Bob', 1.0, 1)
+    for _ in range(3):
+        a.add_user_contribution('Alice', 1.0, 1)
+    assert [(user['username'], user['total_emissions_avoided']) for user in b.get_top_users()] == [('Alice', 3.0), ('Bob', 2.0)]
+    
+    script = (
+        "import sys\n"
+        "from models.leaderboard import Leaderboard\n"
+        "board = Leaderboard(data_file=sys.argv[1], compact_every=7, flush_interval_ms=int(sys.argv[3]))\n"
+        "for i in range(200):\n"
+        "    board.add_user_contribution('shared', 1.0, 1)\n"
+        "    board.add_user_contribution(sys.argv[2], 1.0, 1)\n"
+        "board.add_user_contributions([('shared', 1.0, 1)] * 50)\n"
+        "board.close()\n"
+    )
+    src = os.path.join(os.path.dirname(__file__), '..', 'src')
+    processes = [
+        subprocess.Popen([sys.executable, '-c', script, data_file, f'worker{i}', str(i % 2 * 5)], cwd=src)
+        for i in range(4)
+    ]
+    for process in processes:
+        assert process.wait(timeout=120) == 0
+    
+    totals = {user['username']: user['contributions'] for user in Leaderboard(data_file=data_file).leaderboard}
+    assert totals == {'Alice': 3, 'Bob': 2, 'shared': 1000, 'worker0': 200, 'worker1': 200, 'worker2': 200, 'worker3': 200}
+    # The instances still open here catch up with the other processes
+    assert b.get_user_rank('shared') == 1
+    assert len(a) == 7
+    
+    # A throttled reader only looks for other processes' writes once per interval
+    throttled = Leaderboard(data_file=data_file, refresh_interval_ms=60_000)
+    assert throttled.get_user_rank('Carol') is None
+    a.add_user_contribution('Carol', 1.0, 1)
+    assert throttled.get_user_rank('Carol') is None
+    throttled._next_refresh = 0
+    assert throttled.get_user_rank('Carol') == 8
+
+def test_leaderboard_legacy_snapshot_migration(tmp_path):
+    """A plain-list snapshot is migrated by compaction without changing any entry"""
+    import json
+    from models.leaderboard import Leaderboard
+    
+    legacy = json.loads(open(os.path.join(os.path.dirname(__file__), '..', 'data', 'leaderboard.json')).read())
+    data_file = tmp_path / 'leaderboard.json'
+    data_file.write_text(json.dumps(legacy))
+    
+    board = Leaderboard(data_file=str(data_file))
+    before = board.leaderboard
+    board.compact()
+    board.close()
+    
+    snapshot = json.loads(data_file.read_text())
+    assert snapshot['last_seq'] == 0
+    assert sorted(snapshot['users'], key=lambda user: user['username']) == sorted(legacy, key=lambda user: user['username'])
+    
+    reloaded = Leaderboard(data_file=str(data_file))
+    assert reloaded.leaderboard == before
+    # New contributions continue the sequence after the migrated snapshot
+    reloaded.add_user_contribution('Newcomer', 0.1, 1)
+    reloaded.compact()
+    assert json.loads(data_file.read_text())['last_seq'] == 1
+    assert Leaderboard(data_file=str(data_file)).get_user_rank('Newcomer') == len(legacy) + 1
+
+def test_fractional_contributions_over_http(tmp_path):
+    """Emission results with fractional quantities are accepted by /add_contributions"""
+    from models.emission_calculator import EmissionCalculator
+    from models.leaderboard import Leaderboard
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+    from src.web import app as web
+    
+    emission_results = EmissionCalculator().calculate_avoided_emissions([
+        {'name': 'rice', 'quantity': 1.5, 'days_until_expiry': 1},
+        {'name': 'tomato', 'quantity': 2, 'days_until_expiry': 2}
+    ])
+    assert emission_results['items_saved'] == 3.5
+    
+    board = Leaderboard(data_file=str(tmp_path / 'leaderboard.json'))
+    previous_board = web.system._components.get('leaderboard')
+    web.system._components['leaderboard'] = board
+    try:
+        response = web.app.test_client().post('/add_contributions', json={'contributions': [
+            {'username': 'Alice', 'emission_results': emission_results},
+            {'username': 'Bob', 'emission_results': {'avoided_emissions_kg': 1.0, 'items_saved': float('inf')}}
+        ]})
+        result = response.get_json()
+        assert result['accepted'] == 1
+        assert [error['index'] for error in result['errors']] == [1]
+        assert board.get_top_users()[0]['total_items_saved'] == 3.5
+    finally:
+        if previous_board is None:
+            web.system._components.pop('leaderboard')
+        else:
+            web.system._components['leaderboard'] = previous_board
+
+def test_recipes_consume_fractional_quantities():
+    """Recipes use up the fractional rest of an item without going below zero"""
+    from models.emission_calculator import EmissionCalculator
+    from models.inventory import Inventory, ExpiringStock
+    
+    food_items = [{'name': 'rice', 'quantity': 1.5, 'days_until_expiry': 1}]
+    stock = ExpiringStock(Inventory.from_items(food_items))
+    assert stock.consume('rice') == 1
+    assert stock.consume('rice') == 0.5
+    assert stock.consume('rice') == 0
+    assert not stock.available('rice')
+    
+    calculator = EmissionCalculator()
+    fried_rice = {'name': 'Fried Rice', 'ingredients': ['rice']}
+    results = calculator.calculate_avoided_emissions(food_items, recipes_used=[fried_rice] * 3)
+    assert results['items_saved'] == 1.5
+    assert results['avoided_emissions_kg'] == round(1.5 * calculator.get_food_footprint('rice'), 2)
+    # Extra recipes cannot save more than the whole inventory
+    assert results['waste_prevented_percentage'] == 100
+
 if __name__ == "__main__":
     test_system()
\ No newline at end of file